@@ -0,0 +1,32 @@
+"""
+Measures the per step overhead of ProgressAndLog.track_latency().
+
+Dots and messages are disabled, so that only the cost of progress_step()
+itself is measured.
+"""
+
+from timeit import default_timer
+
+from monologue.core import ProgressAndLog
+
+N_STEPS = 1000000
+
+
+def time_steps(logger):
+    logger.progress_reset()
+    start = default_timer()
+    for count in range(N_STEPS):
+        logger.progress_step()
+    return (default_timer() - start) / N_STEPS
+
+
+if __name__ == '__main__':
+    logger = ProgressAndLog("bench", 0)
+    logger.dot_every(0)
+    plain = time_steps(logger)
+    logger.track_latency()
+    tracked = time_steps(logger)
+    print("progress_step: %.3fus" % (plain * 1e6))
+    print("progress_step with track_latency: %.3fus" % (tracked * 1e6))
+    print("overhead per step: %.3fus" % ((tracked - plain) * 1e6))
+    print("step duration: %s" % logger._latency.summary())
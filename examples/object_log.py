@@ -42,13 +42,13 @@ class Boss(BaseClass):
     def yell(self):
         log = self._get_logger()
         log.msg('Get to work!!')
-        employes = [Employee(name='%s Average' % n,
-                            verbose=log.clone())
-                    for n, _ in zip(range(self.n_employees),
-                                 FIRST_NAMES)]
+        employes = [Employee(name='%s Average' % first_name,
+                             verbose=log.clone('%s.%d' % (log.logger.name, n)))
+                    for n, first_name in zip(range(self.n_employees),
+                                             FIRST_NAMES)]
 
         for employe in employes:
-            employe.work()
+            employe.work('today')
 
 
 if __name__ == '__main__':
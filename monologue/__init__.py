@@ -8,7 +8,13 @@ For convenience, all standard debug level are importable from this module
 
 from logging import DEBUG, INFO, WARNING, ERROR, CRITICAL
 
-from .core import get_logger, PROGRESS
+from .core import get_logger, stats, before_fork, after_fork, \
+    current_logger, PROGRESS
+from .sinks import FlushPolicy, SocketSink, flush_all, \
+    install_signal_handlers, reopen_per_pid
+from .ringbuffer import RingBufferFile, read_ring
+from .config import configure
+from .capture import Capture
 from . import core
 
 get_logger = get_logger
@@ -0,0 +1,198 @@
+"""
+In-memory logfile recording what loggers output as events, for tests and
+in-process consumers.
+
+Messages are kept unformatted (the log record, with its template and
+arguments); text is only produced on request, by text(), exactly as a file
+would have received it.
+
+>>> from monologue.core import ProgressAndLog
+>>> logger = ProgressAndLog("test.capture", 0, logfile=Capture())
+>>> capture = logger._logfiles[0]
+>>> logger.dot_every(2)
+>>> for count in range(4):
+...     logger.progress_step()
+>>> logger.msg("%d items", msgvars=4)
+>>> capture.assert_logged("%d items")
+>>> capture.assert_logged("4 items", count=1)
+>>> capture.dots()
+2
+>>> capture.text()
+'..\\n[test.capture] 4 items\\n'
+"""
+
+import os
+from collections import namedtuple
+from logging import Handler
+
+MESSAGE = 'message'
+DOT = 'dot'
+LINEBREAK = 'linebreak'
+
+# kind: MESSAGE, DOT or LINEBREAK
+# level, name, template, args: of messages, None for dots and line breaks
+# text: of dots and line breaks, None for messages
+# iteration: iterations done by the logger at that time
+Event = namedtuple('Event', 'kind level name template args text iteration '
+                            'record')
+
+
+class Capture(object):
+    """
+    Logfile recording events in a preallocated list (doubled when full).
+
+    Give it to ProgressAndLog.add_logfile like any logfile, or use
+    ProgressAndLog.capture(). A capture is meant for one logger: dots are
+    attributed to the last logger it was added to.
+
+    Parameters
+    ----------
+    capacity: int
+        initial number of events
+    """
+    def __init__(self, capacity=1024):
+        self._events = [None] * capacity
+        self.count = 0
+        self.owner = None
+        self.formatter = None
+
+    def _append(self, event):
+        """
+        Stores an event
+        """
+        if self.count == len(self._events):
+            self._events.extend([None] * len(self._events))
+        self._events[self.count] = event
+        self.count += 1
+
+    def _iteration(self):
+        """
+        Iterations done by the owner
+        """
+        if self.owner is None:
+            return None
+        return self.owner._iterations
+
+    def record(self, record):
+        """
+        Stores a log record, unformatted (see CaptureHandler)
+        """
+        self._append(Event(MESSAGE, record.levelno, record.name, record.msg,
+                           record.args, None, self._iteration(), record))
+
+    def write(self, data):
+        """
+        Stores dots and line breaks
+        """
+        kind = LINEBREAK if data == os.linesep else DOT
+        self._append(Event(kind, None, None, None, None, data,
+                           self._iteration(), None))
+
+    def write_dots(self, dot_string, count):
+        """
+        Stores dots written at once, one event per dot (see
+        ProgressAndLog.dot)
+        """
+        event = Event(DOT, None, None, None, None, dot_string,
+                      self._iteration(), None)
+        for index in range(count):
+            self._append(event)
+
+    def flush(self):
+        """
+        Nothing to flush
+        """
+
+    @property
+    def events(self):
+        """
+        The recorded events, oldest first
+        """
+        return self._events[:self.count]
+
+    def clear(self):
+        """
+        Forgets the recorded events
+        """
+        for index in range(self.count):
+            self._events[index] = None
+        self.count = 0
+
+    def messages(self, level=None):
+        """
+        The recorded messages (formatted, without prefix), of the given
+        level or above
+        """
+        return [event.record.getMessage() for event in self.events
+                if event.kind == MESSAGE
+                and (level is None or event.level >= level)]
+
+    def dots(self, dot_string=None):
+        """
+        Number of recorded dots (of the given dot string)
+        """
+        return sum(1 for event in self.events if event.kind == DOT
+                   and (dot_string is None or event.text == dot_string))
+
+    def text(self):
+        """
+        The text a file would have received
+        """
+        chunks = []
+        for event in self.events:
+            if event.kind == MESSAGE:
+                if self.formatter is not None:
+                    chunks.append(self.formatter.format(event.record))
+                else:
+                    chunks.append(event.record.getMessage())
+                chunks.append('\n')
+            else:
+                chunks.append(event.text)
+        return ''.join(chunks)
+
+    def find(self, message, level=None):
+        """
+        The message events whose template or formatted text is `message`
+        (of the given level, if any)
+        """
+        return [event for event in self.events if event.kind == MESSAGE
+                and (level is None or event.level == level)
+                and (event.template == message
+                     or event.record.getMessage() == message)]
+
+    def assert_logged(self, message, level=None, count=None):
+        """
+        Raises AssertionError unless `message` (template or formatted text)
+        was logged, `count` times if given
+        """
+        found = len(self.find(message, level))
+        if (count is None and not found) or \
+                (count is not None and found != count):
+            raise AssertionError(
+                "%r logged %d times, expected %s; messages:\n%s"
+                % (message, found, "at least once" if count is None
+                   else count, "\n".join(self.messages())))
+
+    def assert_not_logged(self, message, level=None):
+        """
+        Raises AssertionError if `message` (template or formatted text) was
+        logged
+        """
+        self.assert_logged(message, level, count=0)
+
+
+class CaptureHandler(Handler):
+    """
+    Handler handing the log records to a Capture, without formatting them
+    """
+    def __init__(self, capture, owner=None):
+        Handler.__init__(self)
+        self.stream = capture
+        capture.owner = owner
+
+    def setFormatter(self, fmt):
+        Handler.setFormatter(self, fmt)
+        self.stream.formatter = fmt
+
+    def emit(self, record):
+        self.stream.record(record)
@@ -0,0 +1,395 @@
+"""
+Declarative configuration of many loggers at once.
+
+::
+
+    monologue.configure({
+        "sinks": {
+            "job": {"path": "job.log", "timestamp": True},
+            "console": {"stream": "stderr", "level": "WARNING"},
+        },
+        "loggers": {
+            "*": {"logfiles": ["console"], "dot_every": 0},
+            "job.*": {"logfiles": ["job", "console"], "progress_every": 1000,
+                      "verbosity_offset": -10},
+        },
+    })
+
+or the same as a JSON file: ``monologue.configure("logging.json")``.
+
+sinks: name -> description
+    path (a file, opened once and shared by all loggers) or stream
+    ('stdout' or 'stderr'); optional: timestamp, dots, level (int or level
+    name), compress, index, flush_policy (arguments of FlushPolicy),
+    scheduled, as in ProgressAndLog.add_logfile
+loggers: glob pattern on logger names -> settings
+    verbosity_offset, logfiles (names of sinks), dot_every, progress_every,
+    percent_print_every, dot_string. When several patterns match, the most
+    specific one (with the most literal characters) wins, setting by
+    setting.
+
+Settings are applied by get_logger when a matching logger is created, and
+to the existing loggers when configure() is called again: reload(), or
+configure(path, reload_signal=signal.SIGHUP). A new configuration is
+validated and its new sinks are opened before any logger is changed: if it
+is invalid, nothing changes. Sinks whose file is opened the same way are
+kept open (a change of timestamp, dots or level only replaces handlers).
+If applying the settings fails anyway, the loggers already changed are
+restored. A logger matching no pattern of the new configuration is left
+as it is: it keeps the sinks and settings of the previous one.
+"""
+
+import json
+import signal
+import sys
+import threading
+from fnmatch import fnmatchcase
+from logging import getLevelName
+
+from . import core, sinks
+from .core import ProgressAndLog
+from .sinks import (CompressedFile, DurableFile, FlushPolicy, IndexedFile,
+                    ScheduledFile)
+
+_SINK_KEYS = frozenset(['path', 'stream', 'timestamp', 'dots', 'level',
+                        'compress', 'index', 'flush_policy', 'scheduled'])
+# keys of a sink deciding how its file is opened: the file is kept open
+# when only the others change
+_FILE_KEYS = ('path', 'stream', 'compress', 'index', 'flush_policy',
+              'scheduled')
+_INT_SETTINGS = ('verbosity_offset', 'dot_every', 'progress_every',
+                 'percent_print_every')
+_LOGGER_KEYS = frozenset(_INT_SETTINGS + ('logfiles', 'dot_string'))
+_STREAMS = ('stdout', 'stderr')
+
+try:
+    basestring
+except NameError:
+    basestring = str
+
+_LOCK = threading.RLock()
+# path of the last configuration file, see reload
+_source = None
+
+
+def _level(value):
+    """
+    Logging level from an int or a level name
+    """
+    if value is None or isinstance(value, int):
+        return value
+    level = getLevelName(value)
+    if not isinstance(level, int):
+        raise ValueError("unknown logging level %r" % (value,))
+    return level
+
+
+def _file_spec(spec):
+    """
+    The part of the description of a sink deciding how its file is opened
+    """
+    return dict((key, spec[key]) for key in _FILE_KEYS if key in spec)
+
+
+class _Configuration(object):
+    """
+    A validated configuration, and the sinks it opened
+    """
+    def __init__(self, config, previous=None):
+        unknown = set(config) - set(['sinks', 'loggers'])
+        if unknown:
+            raise ValueError("unknown configuration sections: %s"
+                             % ", ".join(sorted(unknown)))
+        self.sink_specs = dict(config.get('sinks', {}))
+        for name, spec in self.sink_specs.items():
+            self._check_sink(name, spec)
+        self.patterns = []
+        for pattern, settings in config.get('loggers', {}).items():
+            self._check_settings(pattern, settings)
+            self.patterns.append((pattern, dict(settings)))
+        # least specific first, so that more specific patterns override
+        self.patterns.sort(key=lambda item: (
+            len(item[0]) - sum(item[0].count(char) for char in '*?['),
+            item[0]))
+        self.sinks = {}
+        self.opened = set()
+        # sinks opened by this configuration, closed if it is not applied
+        self.new = new = []
+        try:
+            for name, spec in self.sink_specs.items():
+                if previous is not None and \
+                        name in previous.sink_specs and \
+                        _file_spec(previous.sink_specs[name]) == \
+                        _file_spec(spec):
+                    self.sinks[name] = previous.sinks[name]
+                    if name in previous.opened:
+                        self.opened.add(name)
+                else:
+                    self.sinks[name] = self._open(spec)
+                    if 'path' in spec:
+                        self.opened.add(name)
+                        new.append(self.sinks[name])
+        except Exception:
+            # nothing changes
+            self.discard()
+            raise
+
+    def discard(self):
+        """
+        Closes the sinks opened by this configuration, not applied
+        """
+        for logfile in self.new:
+            logfile.close()
+
+    def _check_sink(self, name, spec):
+        """
+        Raises ValueError if the description of the sink is invalid
+        """
+        unknown = set(spec) - _SINK_KEYS
+        if unknown:
+            raise ValueError("sink %r: unknown keys %s"
+                             % (name, ", ".join(sorted(unknown))))
+        if ('path' in spec) == ('stream' in spec):
+            raise ValueError("sink %r: expected either a path or a stream"
+                             % name)
+        if 'stream' in spec and spec['stream'] not in _STREAMS:
+            raise ValueError("sink %r: stream must be one of %s"
+                             % (name, ", ".join(_STREAMS)))
+        if spec.get('compress') and spec.get('index'):
+            raise ValueError("sink %r: compressed logfiles cannot be "
+                             "indexed" % name)
+        if 'stream' in spec and (spec.get('compress') or spec.get('index')):
+            raise ValueError("sink %r: a stream cannot be compressed or "
+                             "indexed" % name)
+        _level(spec.get('level'))
+
+    def _check_settings(self, pattern, settings):
+        """
+        Raises ValueError if the settings of a logger pattern are invalid
+        """
+        unknown = set(settings) - _LOGGER_KEYS
+        if unknown:
+            raise ValueError("loggers %r: unknown settings %s"
+                             % (pattern, ", ".join(sorted(unknown))))
+        for key in _INT_SETTINGS:
+            if key in settings and not isinstance(settings[key], int):
+                raise ValueError("loggers %r: %s must be an integer"
+                                 % (pattern, key))
+        if 'dot_string' in settings and \
+                not isinstance(settings['dot_string'], basestring):
+            raise ValueError("loggers %r: dot_string must be a string"
+                             % pattern)
+        for name in settings.get('logfiles', ()):
+            if name not in self.sink_specs:
+                raise ValueError("loggers %r: unknown sink %r"
+                                 % (pattern, name))
+
+    def _open(self, spec):
+        """
+        The file object of a sink
+        """
+        if 'stream' in spec:
+            logfile = getattr(sys, spec['stream'])
+            if spec.get('scheduled'):
+                logfile = ScheduledFile(logfile)
+            return logfile
+        path = spec['path']
+        if spec.get('compress'):
+            logfile = CompressedFile(path, spec['compress'])
+        elif spec.get('index'):
+            index = spec['index']
+            if index is True:
+                logfile = IndexedFile(path)
+            else:
+                logfile = IndexedFile(path, index_every=index)
+        else:
+            logfile = sinks.open_logfile(path)
+        if spec.get('flush_policy') is not None:
+            logfile = DurableFile(logfile, FlushPolicy(**spec['flush_policy']))
+        if spec.get('scheduled'):
+            logfile = ScheduledFile(logfile)
+        return logfile
+
+    def _entry(self, name):
+        """
+        (file, dots, timestamp, level) of a sink, as given to add_logfile
+        """
+        spec = self.sink_specs[name]
+        return (self.sinks[name], spec.get('dots', True),
+                spec.get('timestamp', False), _level(spec.get('level')))
+
+    def settings(self, name):
+        """
+        Settings of the logger `name`, None if no pattern matches
+        """
+        settings = None
+        for pattern, pattern_settings in self.patterns:
+            if fnmatchcase(name, pattern):
+                if settings is None:
+                    settings = {}
+                settings.update(pattern_settings)
+        return settings
+
+    def create(self, name, verbosity_offset, logfile, timestamp):
+        """
+        New logger for get_logger, configured if its name matches
+        """
+        settings = self.settings(name)
+        if settings is None or not settings.get('logfiles'):
+            logger = ProgressAndLog(name, verbosity_offset=verbosity_offset,
+                                    logfile=logfile, timestamp=timestamp)
+        else:
+            # no logfile opened for nothing
+            entry = self._entry(settings['logfiles'][0])
+            logger = ProgressAndLog(name, verbosity_offset=verbosity_offset,
+                                    logfile=entry[0], timestamp=entry[2])
+            logger._configured_logfiles = [(entry[0], True, entry[2], None)]
+        if settings is not None:
+            self.apply(logger, settings)
+        return logger
+
+    def apply(self, logger, settings):
+        """
+        Applies settings to a logger
+        """
+        if 'logfiles' in settings:
+            self._apply_logfiles(logger, settings['logfiles'])
+        if 'verbosity_offset' in settings:
+            logger.set_offset(settings['verbosity_offset'])
+        for key in ('dot_every', 'progress_every', 'percent_print_every'):
+            if key in settings:
+                getattr(logger, key)(settings[key])
+        if 'dot_string' in settings:
+            logger.set_dot_string(settings['dot_string'])
+
+    def _apply_logfiles(self, logger, names):
+        """
+        Makes the logger write to the given sinks only, keeping the
+        handlers of the sinks it already writes to. The handlers are
+        swapped in one step: no message is lost or written twice.
+        """
+        wanted = [self._entry(name) for name in names]
+        current = getattr(logger, '_configured_logfiles', None)
+        if current == wanted:
+            return
+        if current is None:
+            # logfiles given to get_logger are replaced
+            removed = list(logger._logfiles)
+            current = []
+        else:
+            removed = [entry[0] for entry in current if entry not in wanted]
+        added = [entry for entry in wanted if entry not in current]
+        logger._swap_logfiles(removed, added)
+        logger._configured_logfiles = wanted
+
+    def close_unused(self, other):
+        """
+        Closes the sinks opened by `other` that this configuration and the
+        loggers (clones included) do not use
+        """
+        if other is None:
+            return
+        kept = set(id(logfile) for logfile in self.sinks.values())
+        for logger in list(core._INSTANCES.keys()):
+            kept.update(id(logfile) for logfile in logger._logfiles)
+        for name in other.opened:
+            logfile = other.sinks[name]
+            if id(logfile) not in kept:
+                logfile.close()
+
+
+def _save_state(logger):
+    """
+    What applying settings may change in a logger, see _restore_state.
+    Its lists are replaced rather than modified: a shallow copy will do.
+    """
+    return dict(vars(logger)), logger.logger.handlers
+
+
+def _restore_state(logger, state):
+    """
+    Puts back the state saved by _save_state
+    """
+    attributes, handlers = state
+    vars(logger).clear()
+    vars(logger).update(attributes)
+    with core._logging_lock:
+        logger.logger.handlers = handlers
+    logger._apply_level()
+
+
+def configure(config, reload_signal=None):
+    """
+    Configures the loggers matching the patterns of `config`: the existing
+    ones now, the others when created by get_logger. See the module
+    documentation for the format.
+
+    Parameters
+    ----------
+    config: dict, or path of a JSON file
+    reload_signal: int, optional
+        reload the file upon this signal (e.g. signal.SIGHUP), see reload,
+        from a thread started by the signal handler. Must be called from
+        the main thread.
+    """
+    global _source
+    with _LOCK:
+        if isinstance(config, dict):
+            source = None
+        else:
+            source = config
+            with open(source) as fdesc:
+                config = json.load(fdesc)
+        previous = core._configuration
+        configuration = _Configuration(config, previous)
+        changed = []
+        try:
+            for name, logger in list(core._LOGGERS.items()):
+                settings = configuration.settings(name)
+                if settings is not None:
+                    changed.append((logger, _save_state(logger)))
+                    configuration.apply(logger, settings)
+        except Exception:
+            # nothing changes
+            for logger, state in reversed(changed):
+                _restore_state(logger, state)
+            configuration.discard()
+            raise
+        core._configuration = configuration
+        _source = source
+        configuration.close_unused(previous)
+    if reload_signal is not None:
+        signal.signal(reload_signal, _reload_handler)
+
+
+def reload():
+    """
+    Applies the configuration file last given to configure() again, as it
+    is now
+    """
+    if _source is None:
+        raise ValueError("no configuration file to reload")
+    configure(_source)
+
+
+def _reload_handler(signum, frame):
+    """
+    Signal handler: reloads from a thread of its own, once the code that
+    was interrupted (configure() itself, maybe) released the lock
+    """
+    thread = threading.Thread(target=_reload_reporting,
+                              name="monologue-reload")
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def _reload_reporting():
+    """
+    Reloads, reports errors without raising them
+    """
+    try:
+        reload()
+    except Exception as error:
+        sys.stderr.write("monologue: configuration not reloaded: %s\n"
+                         % error)
@@ -0,0 +1,206 @@
+"""
+Time range queries on big logfiles.
+
+Logfiles added with ``add_logfile(path, index=True)`` come with a sparse
+index, ``<path>.idx``: every 64KB (by default), the time, byte offset and
+logger name of the message written there. read_range() binary searches the
+index, then reads the memory mapped logfile from the closest entry only:
+the cost of a query depends on the size of the answer, not on the size of
+the logfile.
+
+From the command line::
+
+    python -m monologue.logread job.log "2026-10-19 03:12" "2026-10-19 03:13"
+
+Times are taken from the timestamps of the lines (add_logfile(...,
+timestamp=True)); for logfiles without timestamps, the answer is
+approximated by the index, to `index_every` bytes.
+"""
+
+import mmap
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+from .sinks import INDEX_ENTRY
+
+# [asctime][name] message, or [name] message
+_TIMESTAMPED = re.compile(
+    b'\\[(\\d{4}-\\d\\d-\\d\\d \\d\\d:\\d\\d:\\d\\d),(\\d{3})\\]\\[([^\\]]*)\\] ')
+_NAMED = re.compile(b'\\[([^\\]]*)\\] ')
+_TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+
+def parse_time(value):
+    """
+    Seconds since the epoch, from a number, a datetime (local time) or a
+    string formatted as "YYYY-MM-DD[ HH:MM[:SS]]" (local time)
+    """
+    if isinstance(value, datetime):
+        return time.mktime(value.timetuple()) + value.microsecond / 1e6
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for time_format in _TIME_FORMATS:
+        try:
+            return time.mktime(time.strptime(value, time_format))
+        except ValueError:
+            continue
+    raise ValueError("cannot read time %r, expected a number of seconds "
+                     "or YYYY-MM-DD[ HH:MM[:SS]]" % (value,))
+
+
+def read_index(path):
+    """
+    Entries of an index written by monologue.sinks.IndexedFile, as a list
+    of (time, offset, logger name)
+    """
+    with open(path, 'rb') as fdesc:
+        data = fdesc.read()
+    count = len(data) // INDEX_ENTRY.size
+    entries = []
+    for position in range(count):
+        created, offset, name = INDEX_ENTRY.unpack_from(
+            data, position * INDEX_ENTRY.size)
+        entries.append((created, offset, name.rstrip(b'\0').decode('utf-8')))
+    return entries
+
+
+def _bounds(path, start, end):
+    """
+    Offset of the last index entry before `start`, and offset of the first
+    entry after `end` (None: end of file)
+    """
+    if not os.path.exists(path) or not os.path.getsize(path):
+        return 0, None
+    with open(path, 'rb') as fdesc:
+        buf = mmap.mmap(fdesc.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            count = len(buf) // INDEX_ENTRY.size
+
+            def entry(position):
+                """
+                (time, offset) of an entry
+                """
+                return INDEX_ENTRY.unpack_from(
+                    buf, position * INDEX_ENTRY.size)[:2]
+
+            def first_after(limit, included=False):
+                """
+                Position of the first entry with a time above limit (or
+                equal to it, if included)
+                """
+                low, high = 0, count
+                while low < high:
+                    middle = (low + high) // 2
+                    time_ = entry(middle)[0]
+                    if time_ < limit or (time_ == limit and not included):
+                        low = middle + 1
+                    else:
+                        high = middle
+                return low
+
+            low_offset = 0
+            if start is not None:
+                # entries of the same time as start may follow earlier
+                # records of that time: start before all of them
+                position = first_after(start, included=True) - 1
+                if position >= 0:
+                    low_offset = entry(position)[1]
+            high_offset = None
+            if end is not None:
+                position = first_after(end)
+                if position < count:
+                    high_offset = entry(position)[1]
+            return low_offset, high_offset
+        finally:
+            buf.close()
+
+
+def read_range(path, start=None, end=None, name=None, index_path=None):
+    """
+    Yields the lines (bytes, line break included) of the logfile at `path`
+    written from `start` (included) to `end` (excluded), see parse_time for
+    the accepted values. None means no limit.
+
+    name: string, optional
+        only the lines of this logger and of its children
+        ("job" selects "job" and "job.parse"). Lines without a name (dots,
+        continued messages) belong to the message before them.
+    index_path: string, optional
+        defaults to `path` followed by '.idx'. Without index, the whole
+        logfile is read.
+    """
+    if start is not None:
+        start = parse_time(start)
+    if end is not None:
+        end = parse_time(end)
+    if index_path is None:
+        index_path = path + '.idx'
+    offset, high = _bounds(index_path, start, end)
+    if name is not None:
+        name = name.encode('utf-8')
+        prefix = name + b'.'
+    with open(path, 'rb') as fdesc:
+        if not os.fstat(fdesc.fileno()).st_size:
+            return
+        buf = mmap.mmap(fdesc.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if high is None or high > len(buf):
+                high = len(buf)
+            current = current_name = None
+            last_stamp = None
+            while offset < high:
+                line_end = buf.find(b'\n', offset, high)
+                line_end = high if line_end < 0 else line_end + 1
+                line = buf[offset:line_end]
+                offset = line_end
+                match = _TIMESTAMPED.match(line)
+                if match is not None:
+                    stamp, millis, current_name = match.groups()
+                    if stamp != last_stamp:
+                        last_stamp = stamp
+                        seconds = time.mktime(time.strptime(
+                            stamp.decode('ascii'), _TIME_FORMATS[0]))
+                    current = seconds + int(millis) / 1000.
+                    if end is not None and current >= end:
+                        break
+                else:
+                    match = _NAMED.match(line)
+                    if match is not None:
+                        current_name = match.group(1)
+                if start is not None and current is not None and \
+                        current < start:
+                    continue
+                if name is not None and current_name != name and \
+                        not (current_name or b'').startswith(prefix):
+                    continue
+                yield line
+        finally:
+            buf.close()
+
+
+def main(argv=None):
+    """
+    Command line: prints the lines of a logfile in a time range
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if not 2 <= len(argv) <= 4:
+        sys.stderr.write("usage: python -m monologue.logread "
+                         "LOGFILE START [END [LOGGER_NAME]]\n")
+        return 2
+    path, start = argv[:2]
+    end = argv[2] if len(argv) > 2 else None
+    name = argv[3] if len(argv) > 3 else None
+    output = getattr(sys.stdout, 'buffer', sys.stdout)
+    for line in read_range(path, start, end or None, name):
+        output.write(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
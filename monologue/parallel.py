@@ -0,0 +1,139 @@
+"""
+Parallel map with progress, see ProgressAndLog.map and
+ProgressAndLog.imap_unordered.
+
+Requires concurrent.futures (standard library since Python 3.2, 'futures'
+package for Python 2), imported upon first use only.
+"""
+
+from collections import deque
+from itertools import islice
+from logging import Handler
+from multiprocessing import cpu_count
+
+from .core import get_logger
+
+# name of the logger whose messages are captured in this worker process,
+# and the messages captured while running the current chunk
+_CAPTURED = {}
+
+
+class _CaptureHandler(Handler):
+    """
+    Keeps (level, formatted message) of the records emitted in a worker,
+    for the parent to print them.
+    """
+    def __init__(self):
+        Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append((record.levelno, record.getMessage()))
+
+
+def _run_chunk(func, name, offset, chunk):
+    """
+    Runs func on each item of chunk in a worker process.
+    Returns the results and the messages the worker logged with the logger
+    called `name`.
+    """
+    handler = _CAPTURED.get(name)
+    if handler is None:
+        handler = _CAPTURED[name] = _CaptureHandler()
+        logger = get_logger(name)
+        logger.logger.handlers = [handler]
+        # the parent prints the progress: no dots from workers
+        logger._logfiles = []
+        logger._dot_logfiles = []
+        logger._bars = []
+        logger.set_offset(offset)
+    handler.messages = []
+    results = [func(item) for item in chunk]
+    return results, handler.messages
+
+
+def _run_chunk_in_thread(func, chunk):
+    """
+    Runs func on each item of chunk in a worker thread: messages and dots
+    go through the logger of the parent directly, locked by
+    ProgressAndLog._serialize_output.
+    """
+    return [func(item) for item in chunk], ()
+
+
+def _chunks(iterable, chunksize):
+    """
+    Successive lists of chunksize items of iterable
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parallel_map(progress_and_log, func, iterable, workers, chunksize,
+                 processes, ordered):
+    """
+    Implementation of ProgressAndLog.map and ProgressAndLog.imap_unordered
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, \
+        ThreadPoolExecutor, wait
+
+    if workers is None:
+        workers = cpu_count()
+    if processes:
+        executor = ProcessPoolExecutor(workers)
+        submit_args = (_run_chunk, func, progress_and_log.logger.name,
+                       progress_and_log.offset())
+    else:
+        executor = ThreadPoolExecutor(workers)
+        submit_args = (_run_chunk_in_thread, func)
+        # workers may write dots and messages along with this thread
+        progress_and_log._serialize_output(True)
+    # bounded number of chunks in flight: results are not accumulated
+    in_flight = 2 * workers
+    chunks = _chunks(iterable, chunksize)
+    pending = deque()
+
+    def submit():
+        """
+        Submits the next chunk, returns False when there are no more
+        """
+        for chunk in chunks:
+            future = executor.submit(*(submit_args + (chunk,)))
+            future.size = len(chunk)
+            pending.append(future)
+            return True
+        return False
+
+    def completed(future):
+        """
+        Prints the worker messages, counts progress, returns results
+        """
+        results, messages = future.result()
+        for level, message in messages:
+            progress_and_log.msg(message, verbosity=level)
+        progress_and_log._progress_advance(future.size)
+        return results
+
+    try:
+        while len(pending) < in_flight and submit():
+            pass
+        while pending:
+            if ordered:
+                future = pending.popleft()
+            else:
+                done = wait(pending, return_when=FIRST_COMPLETED)[0]
+                future = done.pop()
+                pending.remove(future)
+            for result in completed(future):
+                yield result
+            submit()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        if not processes:
+            progress_and_log._serialize_output(False)
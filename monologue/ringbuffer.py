@@ -0,0 +1,229 @@
+"""
+Memory mapped ring buffer logfile, for post-mortem debug logs.
+
+Messages are copied into a fixed size file mapped in memory, overwriting the
+oldest ones: the cost of a write is about the cost of a memcpy, and the
+content survives a crash of the process (the kernel owns the pages).
+
+The ring is decoded on request, with RingBufferFile.dump() or read_ring(), or
+from the command line::
+
+    python -m monologue.ringbuffer debug.ring [megabytes]
+
+Typical use: DEBUG messages always on, whatever the verbosity of the logger
+
+>>> from logging import DEBUG
+>>> from monologue import get_logger
+>>> from tempfile import mkdtemp
+>>> import os
+>>> path = os.path.join(mkdtemp(), "debug.ring")
+>>> logger = get_logger("test.ringbuffer")
+>>> ring = RingBufferFile(path, 4096)
+>>> logger.add_logfile(ring, dots=False, level=DEBUG)
+>>> logger.debug("Message only in the ring")
+>>> print(read_ring(path).decode('utf-8'))
+[test.ringbuffer] Message only in the ring
+<BLANKLINE>
+>>> ring.close()
+>>> os.unlink(path)
+"""
+
+import mmap
+import os
+import struct
+import sys
+from logging import ERROR
+
+# magic, capacity, bytes written since creation
+_HEADER = struct.Struct('<8sQQ')
+_MAGIC = b'MONORING'
+_HEADER_SIZE = 64
+_WRITTEN_OFFSET = 16
+_WRITTEN = struct.Struct('<Q')
+
+
+class RingBufferFile(object):
+    """
+    Logfile keeping the last `capacity` bytes written to it in a memory
+    mapped file.
+
+    Parameters
+    ----------
+    path: string
+        the ring file. An existing ring of the same capacity is appended to.
+    capacity: int, bytes
+    dump_to: string or open file, optional
+        where to decode the ring when a message of level `dump_level` or
+        above is written to it
+    dump_level: int, defaults to ERROR
+    """
+    def __init__(self, path, capacity, dump_to=None, dump_level=ERROR):
+        self.path = path
+        self.capacity = capacity
+        self.dump_to = dump_to
+        self.dump_level = dump_level
+        self._open(path)
+
+    def _open(self, path):
+        """
+        Maps the ring file at path
+        """
+        self.name = path
+        capacity = self.capacity
+        size = _HEADER_SIZE + capacity
+        fdesc = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fdesc).st_size != size:
+                os.ftruncate(fdesc, 0)
+                os.ftruncate(fdesc, size)
+            self._map = mmap.mmap(fdesc, size)
+        finally:
+            os.close(fdesc)
+        magic, old_capacity, written = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or old_capacity != capacity:
+            _HEADER.pack_into(self._map, 0, _MAGIC, capacity, 0)
+            written = 0
+        self._written = written
+
+    def write(self, data):
+        """
+        Copies data into the ring, overwriting the oldest bytes
+        """
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        size = len(data)
+        capacity = self.capacity
+        if size > capacity:
+            self._written += size - capacity
+            data = data[-capacity:]
+            size = capacity
+        start = self._written % capacity
+        end = start + size
+        if end <= capacity:
+            self._map[_HEADER_SIZE + start:_HEADER_SIZE + end] = data
+        else:
+            first = capacity - start
+            self._map[_HEADER_SIZE + start:_HEADER_SIZE + capacity] = \
+                data[:first]
+            self._map[_HEADER_SIZE:_HEADER_SIZE + size - first] = \
+                data[first:]
+        self._written += size
+        # header last: a reader never sees a position beyond copied data
+        _WRITTEN.pack_into(self._map, _WRITTEN_OFFSET, self._written)
+
+    def flush(self):
+        """
+        Nothing to do: the pages belong to the kernel as soon as written.
+        See sync()
+        """
+
+    def sync(self):
+        """
+        Writes the pages to disk (survive an OS crash)
+        """
+        self._map.flush()
+
+    def message_done(self, level):
+        """
+        Dumps the ring to `dump_to` after important messages
+        """
+        if self.dump_to is not None and level >= self.dump_level:
+            self.dump(self.dump_to)
+
+    def read(self, max_bytes=None):
+        """
+        Returns the content of the ring, see read_ring
+        """
+        return _decode(self._map, max_bytes)
+
+    def dump(self, target):
+        """
+        Writes the content of the ring to target (a path or an open file)
+        """
+        data = self.read()
+        if hasattr(target, 'write'):
+            target.write(data.decode('utf-8', 'replace'))
+            target.flush()
+        else:
+            with open(target, 'wb') as fdesc:
+                fdesc.write(data)
+
+    def after_fork(self, suffix):
+        """
+        In a child process, with monologue.sinks.reopen_per_pid on: maps
+        its own ring, at the path followed by suffix.
+        Otherwise parent and child keep writing to the same ring, each
+        overwriting the other.
+        """
+        if suffix is not None:
+            self._map.close()
+            self._open(self.path + suffix)
+
+    def close(self):
+        """
+        Unmaps the file
+        """
+        self._map.close()
+
+
+def _decode(buf, max_bytes=None):
+    """
+    Last `max_bytes` bytes (or all valid ones) of a ring, oldest first,
+    starting at a line boundary if older data was overwritten.
+    """
+    magic, capacity, written = _HEADER.unpack_from(buf, 0)
+    if magic != _MAGIC:
+        raise ValueError("not a monologue ring buffer")
+    valid = min(written, capacity)
+    if max_bytes is not None:
+        valid = min(valid, max_bytes)
+    start = (written - valid) % capacity
+    end = start + valid
+    if end <= capacity:
+        data = buf[_HEADER_SIZE + start:_HEADER_SIZE + end]
+    else:
+        data = buf[_HEADER_SIZE + start:_HEADER_SIZE + capacity] + \
+            buf[_HEADER_SIZE:_HEADER_SIZE + end - capacity]
+    if valid < written:
+        # the first line is truncated, unless the byte before it is still
+        # in the ring and ends a line
+        previous = _HEADER_SIZE + (start - 1) % capacity
+        if valid == capacity or buf[previous:previous + 1] != b'\n':
+            data = data[data.find(b'\n') + 1:]
+    return data
+
+
+def read_ring(path, max_bytes=None):
+    """
+    Returns the last `max_bytes` bytes (default: all) of messages held
+    by the ring file at `path`, oldest first.
+    Works on the ring of a running or crashed process.
+    """
+    with open(path, 'rb') as fdesc:
+        buf = mmap.mmap(fdesc.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return _decode(buf, max_bytes)
+        finally:
+            buf.close()
+
+
+def main(argv=None):
+    """
+    Command line: prints the last messages held in a ring file
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if not 1 <= len(argv) <= 2:
+        sys.stderr.write("usage: python -m monologue.ringbuffer "
+                         "RING_FILE [MEGABYTES]\n")
+        return 2
+    max_bytes = None
+    if len(argv) == 2:
+        max_bytes = int(float(argv[1]) * 1024 * 1024)
+    data = read_ring(argv[0], max_bytes)
+    getattr(sys.stdout, 'buffer', sys.stdout).write(data)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1320 @@
+"""
+File-like sinks for ProgressAndLog.add_logfile, and the registry of the
+sinks to flush upon exit.
+
+Sinks wrap an open file (or anything with write() and flush()) and are
+handed to add_logfile like any other logfile.
+"""
+
+import atexit
+import errno
+import os
+import select
+import signal
+import socket
+import struct
+import threading
+import zlib
+from collections import deque
+from logging import INFO, StreamHandler, WARNING
+from timeit import default_timer
+from weakref import WeakKeyDictionary
+
+
+# every logfile given to add_logfile, flushed by flush_all
+_SINKS = WeakKeyDictionary()
+
+# files opened by monologue from a path: {file: path}, see reopen_per_pid
+_OPENED = WeakKeyDictionary()
+
+_reopen_suffix = None
+
+# used by DurableFile, replaced by tests
+_fsync = os.fsync
+
+# called first by flush_all, see add_flush_hook
+_FLUSH_HOOKS = []
+
+
+def register(sink):
+    """
+    Makes flush_all() flush `sink`. Only a weak reference is kept.
+    """
+    try:
+        _SINKS[sink] = True
+    except TypeError:
+        # not weakly referenceable (cStringIO...): nothing to flush anyway
+        pass
+
+
+def add_flush_hook(hook):
+    """
+    Makes flush_all() call `hook` (no arguments) before flushing the sinks,
+    and before the threads of the sinks are stopped at exit: for output
+    held back elsewhere, such as the counts of collapsed repeats.
+    """
+    _FLUSH_HOOKS.append(hook)
+
+
+def _run_flush_hooks():
+    """
+    See add_flush_hook
+    """
+    for hook in _FLUSH_HOOKS:
+        try:
+            hook()
+        except (IOError, OSError, ValueError):
+            # closed file, broken pipe: as in flush_all
+            pass
+
+
+def flush_all():
+    """
+    Flushes all the logfiles given to ProgressAndLog.add_logfile: sinks
+    defined here are sync()ed (fsync included for DurableFile sinks with
+    fsync enabled, pending batches sent for SocketSink). The hooks given
+    to add_flush_hook are called first.
+
+    Called at exit, and upon the signals given to install_signal_handlers.
+    """
+    _run_flush_hooks()
+    for sink in list(_SINKS.keys()):
+        try:
+            getattr(sink, 'sync', sink.flush)()
+        except (IOError, OSError, ValueError):
+            # closed file, broken pipe: nothing we can do while exiting
+            pass
+
+
+atexit.register(flush_all)
+
+
+def open_logfile(path, mode='ab'):
+    """
+    Opens the logfile at `path`, to be reopened per process if
+    reopen_per_pid is on
+    """
+    logfile = open(path, mode)
+    _OPENED[logfile] = path
+    return logfile
+
+
+def reopen_per_pid(enabled=True, suffix=".%(pid)d"):
+    """
+    After a fork, makes the child reopen the logfiles that monologue opened
+    from a path (add_logfile, CompressedFile, RingBufferFile) at the same
+    path followed by `suffix`, formatted with the pid of the child: each
+    worker of a pre-fork server gets its own files.
+    Logfiles opened by the application (sys.stdout...) are shared.
+    """
+    global _reopen_suffix
+    _reopen_suffix = suffix if enabled else None
+
+
+def reopen_suffix():
+    """
+    Suffix of the logfiles of this process, None if reopen_per_pid is off
+    """
+    if _reopen_suffix is None:
+        return None
+    return _reopen_suffix % {'pid': os.getpid()}
+
+
+def reopen(logfile, suffix):
+    """
+    Returns `logfile`, or, if monologue opened it from a path and suffix
+    is not None, the same path followed by suffix, opened in the same mode
+    (when possible)
+    """
+    path = _OPENED.get(logfile) if suffix is not None else None
+    if path is None:
+        return logfile
+    try:
+        new = open(path + suffix, logfile.mode)
+    except (IOError, OSError):
+        # directory removed...: keep sharing the logfile of the parent
+        return logfile
+    _OPENED[new] = path
+    logfile.close()
+    return new
+
+
+def before_fork():
+    """
+    Flushes the buffers of the registered sinks, so that the child process
+    does not inherit (and later write again) buffered output. Unlike
+    flush_all, nothing that can block is done: no fsync, no waiting for
+    background threads, no sending on sockets. See monologue.before_fork
+    """
+    for sink in list(_SINKS.keys()):
+        try:
+            getattr(sink, 'before_fork', sink.flush)()
+        except (IOError, OSError, ValueError):
+            # closed file, broken pipe: the child has nothing to write again
+            pass
+
+
+def after_fork(suffix):
+    """
+    Lets the registered sinks forget the state inherited from the parent
+    process (buffers, background threads, connections), see
+    monologue.after_fork
+    """
+    for sink in list(_SINKS.keys()):
+        if hasattr(sink, 'after_fork'):
+            sink.after_fork(suffix)
+
+
+def install_signal_handlers(signums=(signal.SIGTERM,)):
+    """
+    Flushes all logfiles upon reception of the given signals, then calls
+    the previously installed handler (the default one terminates the
+    process).
+    Must be called from the main thread.
+    """
+    for signum in signums:
+        previous = signal.getsignal(signum)
+        signal.signal(signum, _signal_handler_factory(signum, previous))
+
+
+def _signal_handler_factory(signum, previous):
+    """
+    Signal handler flushing logfiles before chaining to `previous`
+    """
+    def handler(received, frame):
+        """
+        flush, then behave as the previous handler would
+        """
+        flush_all()
+        if callable(previous):
+            previous(received, frame)
+        elif previous == signal.SIG_DFL:
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+
+    return handler
+
+
+class FlushPolicy(object):
+    """
+    When a DurableFile hands its data over to the OS, and when it makes
+    it durable (fsync).
+
+    Parameters
+    ----------
+    every_message: boolean, defaults to True
+        flush after each text message
+    every_bytes: int, optional
+        flush once that many bytes (text or dots) were written
+    every_seconds: float, optional
+        flush on the first write that comes that long after the last flush.
+        There is no timer: what was written before a silence stays
+        buffered until the next write, or flush_all()
+    level: int, defaults to WARNING
+        messages at or above this level are flushed and fsynced (if fsync
+        is enabled) immediately
+    fsync: boolean, defaults to False
+        make flushed data durable, not only handed to the OS
+    fsync_every: float, seconds, defaults to 1.
+        group commit: flushes below `level` share one fsync per period;
+        the last pending fsync happens at the next flush or at exit
+    """
+    def __init__(self, every_message=True, every_bytes=None,
+                 every_seconds=None, level=WARNING, fsync=False,
+                 fsync_every=1.):
+        self.every_message = every_message
+        self.every_bytes = every_bytes
+        self.every_seconds = every_seconds
+        self.level = level
+        self.fsync = fsync
+        self.fsync_every = fsync_every
+
+
+class DurableFile(object):
+    """
+    Logfile flushed (and optionally fsynced) according to a FlushPolicy.
+
+    flush() is what the logging handlers call after each message: it only
+    flushes when the policy says so. sync() always flushes.
+    """
+    def __init__(self, logfile, policy):
+        self.file = logfile
+        self.policy = policy
+        self._unflushed = 0
+        self._last_flush = default_timer()
+        self._unsynced = False
+        self._last_fsync = self._last_flush
+
+    def write(self, data):
+        """
+        Writes, flushing if the amount of data or its age require it
+        """
+        self.file.write(data)
+        self._unflushed += len(data)
+        policy = self.policy
+        if policy.every_bytes is not None and \
+                self._unflushed >= policy.every_bytes:
+            self._flush()
+        elif policy.every_seconds is not None and \
+                default_timer() - self._last_flush >= policy.every_seconds:
+            self._flush()
+
+    def flush(self):
+        """
+        Called after each message: flushes if policy.every_message
+        """
+        if self.policy.every_message:
+            self._flush()
+
+    def message_done(self, level):
+        """
+        Called by SinkHandler after each message of the given level
+        """
+        if level >= self.policy.level:
+            self.sync()
+
+    def sync(self):
+        """
+        Flushes, and fsyncs if the policy asks for it
+        """
+        self._flush(force=True)
+
+    def _flush(self, force=False):
+        """
+        Flushes; fsyncs if the policy asks for it and either `force` is set
+        or the group commit period is over.
+        """
+        if self._unflushed:
+            self.file.flush()
+            self._last_flush = default_timer()
+            self._unflushed = 0
+            self._unsynced = self.policy.fsync
+        if not self._unsynced:
+            return
+        if force or \
+                self._last_flush - self._last_fsync >= self.policy.fsync_every:
+            fileno = getattr(self.file, 'fileno', None)
+            if fileno is not None:
+                _fsync(fileno())
+            self._unsynced = False
+            self._last_fsync = self._last_flush
+
+    def before_fork(self):
+        """
+        Flushes without fsyncing, see sinks.before_fork
+        """
+        getattr(self.file, 'before_fork', self.file.flush)()
+
+    def after_fork(self, suffix):
+        """
+        In a child process: nothing is unflushed, see sinks.after_fork
+        """
+        self._unflushed = 0
+        self._last_flush = self._last_fsync = default_timer()
+        self._unsynced = False
+        self.file = reopen(self.file, suffix)
+        if hasattr(self.file, 'after_fork'):
+            self.file.after_fork(suffix)
+
+    def close(self):
+        """
+        Syncs and closes the underlying file
+        """
+        self.sync()
+        self.file.close()
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+# length prefix of the frames sent by SocketSink over stream sockets
+_FRAME_LENGTH = struct.Struct('!I')
+# socket errors meaning "try again later" rather than "reconnect"
+_BACKPRESSURE_ERRNOS = (errno.EAGAIN, errno.EWOULDBLOCK, errno.ENOBUFS)
+
+
+class SocketSink(object):
+    """
+    Logfile sending batches of output to a local log collector, over a
+    Unix domain socket (address is a path) or localhost (address is a
+    (host, port) tuple).
+
+    Text messages, dots and line breaks are gathered into batches of about
+    `batch_bytes`, sent as one datagram each ('dgram') or as frames
+    prefixed by their length (4 bytes, network order) over a 'stream'
+    socket. A batch is sent when full, when older than `max_delay` seconds
+    (checked upon writes and flushes), after messages of level
+    `flush_level` or above, and by sync() and close().
+
+    Sockets never block the job: when the collector does not keep up, or
+    is unreachable (reconnection is attempted with exponential backoff),
+    batches are kept up to `max_backlog` bytes. Past that, dots and
+    messages below `low_priority` are dropped (and counted in `dropped`);
+    past twice that, the oldest batches are.
+
+    Parameters
+    ----------
+    address: string (Unix socket path) or (host, port)
+    kind: 'dgram' or 'stream'
+    batch_bytes: int
+    max_delay: float, seconds
+    flush_level: int, defaults to WARNING
+    low_priority: int, defaults to INFO (progress messages are below)
+    max_backlog: int, bytes
+    """
+    def __init__(self, address, kind='dgram', batch_bytes=8192,
+                 max_delay=1., flush_level=WARNING, low_priority=INFO,
+                 max_backlog=1 << 20, min_backoff=0.1, max_backoff=30.):
+        self.address = address
+        self.name = repr(address)
+        self.kind = kind
+        self.batch_bytes = batch_bytes
+        self.max_delay = max_delay
+        self.flush_level = flush_level
+        self.low_priority = low_priority
+        self.max_backlog = max_backlog
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.dropped = 0
+        self._family = socket.AF_INET if isinstance(address, tuple) \
+            else socket.AF_UNIX
+        self._type = socket.SOCK_STREAM if kind == 'stream' \
+            else socket.SOCK_DGRAM
+        self._sock = None
+        # a stream connection is being established, see _connect
+        self._connecting = False
+        self._backoff = min_backoff
+        self._retry_at = 0.
+        self._level = None
+        self._batch = []
+        self._batch_size = 0
+        self._batch_since = 0.
+        self._queue = deque()
+        self._backlog = 0
+        self._partial = False
+
+    def message_begin(self, level):
+        """
+        Called by SinkHandler before writing a message
+        """
+        self._level = level
+
+    def message_done(self, level):
+        """
+        Called by SinkHandler after writing a message
+        """
+        self._level = None
+        if level >= self.flush_level:
+            self.sync()
+
+    def write(self, data):
+        """
+        Adds data to the current batch, or drops it if it is of low
+        priority and the backlog is full
+        """
+        if self._level is None or self._level < self.low_priority:
+            if self._backlog >= self.max_backlog:
+                self.dropped += 1
+                return
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        if not self._batch:
+            self._batch_since = default_timer()
+        self._batch.append(data)
+        self._batch_size += len(data)
+        if self._batch_size >= self.batch_bytes:
+            self._seal()
+            self._pump()
+        elif default_timer() - self._batch_since >= self.max_delay:
+            self.flush()
+
+    def flush(self):
+        """
+        Called after each message: sends the current batch if it is older
+        than max_delay, and retries pending ones
+        """
+        if self._batch and \
+                default_timer() - self._batch_since >= self.max_delay:
+            self._seal()
+        if self._queue:
+            self._pump()
+
+    def sync(self):
+        """
+        Sends everything now (as far as the socket accepts it)
+        """
+        self._seal()
+        self._pump()
+
+    def before_fork(self):
+        """
+        Nothing to do: the output still pending is sent by the parent, and
+        forgotten by the child (see after_fork)
+        """
+
+    def after_fork(self, suffix):
+        """
+        In a child process: forgets the output of the parent still pending,
+        and connects its own socket (frames of the two processes must not
+        interleave on a shared stream)
+        """
+        if self._sock is not None:
+            # the parent keeps its connection open
+            self._sock.close()
+            self._sock = None
+        self._connecting = False
+        self._backoff = self.min_backoff
+        self._retry_at = 0.
+        self._batch = []
+        self._batch_size = 0
+        self._queue.clear()
+        self._backlog = 0
+        self._partial = False
+        self.dropped = 0
+
+    def close(self):
+        """
+        Sends what can be sent, and closes the socket
+        """
+        self.sync()
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        self._connecting = False
+
+    def _seal(self):
+        """
+        Turns the current batch into a frame ready to be sent
+        """
+        if not self._batch:
+            return
+        payload = b''.join(self._batch)
+        self._batch = []
+        self._batch_size = 0
+        if self._type == socket.SOCK_STREAM:
+            payload = _FRAME_LENGTH.pack(len(payload)) + payload
+        self._queue.append(payload)
+        self._backlog += len(payload)
+        while self._backlog > 2 * self.max_backlog and len(self._queue) > 1:
+            self._drop_oldest()
+
+    def _drop_oldest(self):
+        """
+        Forgets the oldest frame (unless partially sent)
+        """
+        index = 1 if self._partial else 0
+        frame = self._queue[index]
+        del self._queue[index]
+        self._backlog -= len(frame)
+        self.dropped += 1
+
+    def _connect(self):
+        """
+        Opens a non blocking socket to the collector. The connection may
+        still be in progress when this returns, see _connected.
+        """
+        sock = socket.socket(self._family, self._type)
+        sock.setblocking(False)
+        error = sock.connect_ex(self.address)
+        if error not in (0, errno.EISCONN, errno.EINPROGRESS):
+            sock.close()
+            raise socket.error(error, os.strerror(error))
+        self._sock = sock
+        self._connecting = error == errno.EINPROGRESS
+        if not self._connecting:
+            self._backoff = self.min_backoff
+
+    def _connected(self):
+        """
+        Whether the connection in progress is established, without waiting.
+        Raises socket.error if it failed.
+        """
+        if not select.select([], [self._sock], [], 0)[1]:
+            return False
+        error = self._sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if error:
+            raise socket.error(error, os.strerror(error))
+        self._connecting = False
+        self._backoff = self.min_backoff
+        return True
+
+    def _disconnect(self):
+        """
+        Closes the socket after an error; next attempt after the backoff
+        """
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        self._connecting = False
+        if self._partial:
+            # the collector would not be able to resync on this frame
+            frame = self._queue.popleft()
+            self._backlog -= len(frame)
+            self._partial = False
+        self._retry_at = default_timer() + self._backoff
+        self._backoff = min(2 * self._backoff, self.max_backoff)
+
+    def _pump(self):
+        """
+        Sends queued frames until done or the socket would block
+        """
+        if self._sock is None:
+            if default_timer() < self._retry_at:
+                return
+            try:
+                self._connect()
+            except socket.error:
+                self._disconnect()
+                return
+        if self._connecting:
+            try:
+                if not self._connected():
+                    return
+            except socket.error:
+                self._disconnect()
+                return
+        while self._queue:
+            frame = self._queue[0]
+            try:
+                sent = self._sock.send(frame)
+            except socket.error as exc:
+                if exc.errno in _BACKPRESSURE_ERRNOS:
+                    return
+                if exc.errno == errno.EMSGSIZE:
+                    self._drop_oldest()
+                    continue
+                self._disconnect()
+                return
+            self._backlog -= sent
+            if sent < len(frame):
+                self._queue[0] = frame[sent:]
+                self._partial = True
+                return
+            self._queue.popleft()
+            self._partial = False
+
+
+def _gzip_compress(data):
+    """
+    data as a complete gzip member
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _bz2_compress(data):
+    """
+    data as a complete bzip2 stream
+    """
+    import bz2
+    return bz2.compress(data)
+
+
+def _xz_compress(data):
+    """
+    data as a complete xz stream (Python 3.3+)
+    """
+    import lzma
+    return lzma.compress(data)
+
+
+def _gzip_decompressor():
+    """
+    decompressor of one gzip member
+    """
+    return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+def _bz2_decompressor():
+    """
+    decompressor of one bzip2 stream
+    """
+    import bz2
+    return bz2.BZ2Decompressor()
+
+
+def _xz_decompressor():
+    """
+    decompressor of one xz stream
+    """
+    import lzma
+    return lzma.LZMADecompressor()
+
+
+_COMPRESSORS = {'gzip': _gzip_compress, 'bz2': _bz2_compress,
+                'xz': _xz_compress}
+_DECOMPRESSORS = {'gzip': _gzip_decompressor, 'bz2': _bz2_decompressor,
+                  'xz': _xz_decompressor}
+
+
+# sinks writing from a thread (CompressedFile, ScheduledFile): their threads
+# are stopped at exit
+_THREADED_SINKS = WeakKeyDictionary()
+
+
+def _stop_threads():
+    """
+    Writes the pending output and stops the threads before the interpreter
+    shuts down under their feet
+    """
+    _run_flush_hooks()
+    for sink in list(_THREADED_SINKS.keys()):
+        sink._stop()
+
+
+atexit.register(_stop_threads)
+
+
+class CompressedFile(object):
+    """
+    Logfile compressed by a background thread, by batches.
+
+    Each batch becomes a complete gzip member (or bzip2/xz stream),
+    appended to the file: the file is a valid multi-member archive
+    (``zcat``, ``gzip.open``) that can be followed as it grows, and a file
+    cut by a crash loses at most the batch being written.
+    See read_compressed().
+
+    A batch is compressed once it reaches `batch_bytes`, once it is
+    `max_delay` seconds old, after messages of level `flush_level` or
+    above, and by sync() and close(). Writers only append to the batch.
+
+    Parameters
+    ----------
+    logfile: string or binary file open for writing
+        paths are opened in append mode
+    method: 'gzip', 'bz2' or 'xz' (Python 3.3+)
+    batch_bytes: int
+    max_delay: float, seconds
+    flush_level: int, defaults to WARNING
+    """
+    def __init__(self, logfile, method='gzip', batch_bytes=256 * 1024,
+                 max_delay=5., flush_level=WARNING):
+        if method not in _COMPRESSORS:
+            raise ValueError("unknown compression method %r, expected one "
+                             "of %s" % (method, ', '.join(_COMPRESSORS)))
+        if hasattr(logfile, 'write'):
+            self.file = logfile
+        else:
+            self.file = open_logfile(logfile)
+        self.name = getattr(self.file, 'name', None)
+        self.method = method
+        self._compress = _COMPRESSORS[method]
+        self.batch_bytes = batch_bytes
+        self.max_delay = max_delay
+        self.flush_level = flush_level
+        self._batch = []
+        self._batch_size = 0
+        self._in_progress = False
+        self._closing = False
+        self._condition = threading.Condition()
+        self._start_thread()
+
+    def _start_thread(self):
+        """
+        Starts the compressing thread
+        """
+        self._thread = threading.Thread(target=self._run,
+                                        name="monologue-compress")
+        self._thread.daemon = True
+        self._thread.start()
+        _THREADED_SINKS[self] = True
+
+    def write(self, data):
+        """
+        Appends data to the current batch
+        """
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        with self._condition:
+            self._batch.append(data)
+            self._batch_size += len(data)
+            if self._batch_size >= self.batch_bytes:
+                self._condition.notify()
+
+    def flush(self):
+        """
+        Nothing to do: batches are compressed when full or old enough.
+        See sync()
+        """
+
+    def message_done(self, level):
+        """
+        Called by SinkHandler after each message: important ones are
+        compressed and written without waiting for the batch to fill
+        """
+        if level >= self.flush_level:
+            self.sync()
+
+    def sync(self):
+        """
+        Compresses and writes the current batch, waits until it is done
+        """
+        with self._condition:
+            if not self._batch and not self._in_progress:
+                return
+            self._batch_size = max(self._batch_size, self.batch_bytes)
+            self._condition.notify()
+            while self._batch or self._in_progress:
+                self._condition.wait()
+
+    def after_fork(self, suffix):
+        """
+        In a child process: forgets the batch of the parent (compressed by
+        the parent), and starts a compressing thread, threads being lost
+        by fork
+        """
+        self._batch = []
+        self._batch_size = 0
+        self._in_progress = False
+        self._closing = False
+        # the lock may have been held by the thread of the parent
+        self._condition = threading.Condition()
+        self.file = reopen(self.file, suffix)
+        self.name = getattr(self.file, 'name', None)
+        self._start_thread()
+
+    def close(self):
+        """
+        Writes the last batch, stops the thread, closes the file
+        """
+        self._stop()
+        self.file.close()
+
+    def _stop(self):
+        """
+        Writes the last batch, stops the thread
+        """
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _run(self):
+        """
+        Compressing thread: takes whole batches and appends them to the
+        file as independent members
+        """
+        while True:
+            with self._condition:
+                if not self._closing and \
+                        self._batch_size < self.batch_bytes:
+                    self._condition.wait(self.max_delay)
+                if not self._batch:
+                    if self._closing:
+                        return
+                    # the batch was taken: back to waiting
+                    self._batch_size = 0
+                    continue
+                batch = self._batch
+                self._batch = []
+                self._batch_size = 0
+                self._in_progress = True
+            try:
+                self.file.write(self._compress(b''.join(batch)))
+                self.file.flush()
+            finally:
+                with self._condition:
+                    self._in_progress = False
+                    self._condition.notify_all()
+
+
+# entry of the index written by IndexedFile: time, offset, logger name
+INDEX_ENTRY = struct.Struct('<dQ32s')
+
+
+def _size(logfile):
+    """
+    Current size of an open logfile, in bytes
+    """
+    logfile.flush()
+    try:
+        return os.fstat(logfile.fileno()).st_size
+    except (AttributeError, IOError, OSError, ValueError):
+        # no file descriptor (StringIO...)
+        return logfile.tell()
+
+
+class IndexedFile(object):
+    """
+    Logfile writing a sparse index of its content to a sidecar file: every
+    `index_every` bytes, the time, byte offset and logger name of the
+    message starting there (as INDEX_ENTRY records).
+    monologue.logread uses it to find a time range without reading the
+    whole logfile.
+
+    Parameters
+    ----------
+    logfile: string or file open for writing
+        paths are opened in append mode
+    index_path: string, optional
+        defaults to the path of the logfile followed by '.idx'
+    index_every: int, bytes
+    """
+    def __init__(self, logfile, index_path=None, index_every=64 * 1024):
+        if hasattr(logfile, 'write'):
+            self.file = logfile
+        else:
+            self.file = open_logfile(logfile)
+        self.name = getattr(self.file, 'name', None)
+        if index_path is None:
+            if not isinstance(self.name, str) or self.name.startswith('<'):
+                raise ValueError("index_path is required for logfiles "
+                                 "without a path")
+            index_path = self.name + '.idx'
+        self.index = open_logfile(index_path)
+        self.index_every = index_every
+        self.offset = _size(self.file)
+        self._next_entry = self.offset
+
+    def write(self, data):
+        """
+        Writes data, keeps track of the offset
+        """
+        self.file.write(data)
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        self.offset += len(data)
+
+    def message_record(self, record):
+        """
+        Called by SinkHandler before each message: indexes it if the last
+        entry is `index_every` bytes behind
+        """
+        if self.offset < self._next_entry:
+            return
+        self.index.write(INDEX_ENTRY.pack(
+            record.created, self.offset, record.name.encode('utf-8')[:32]))
+        self.index.flush()
+        self._next_entry = self.offset + self.index_every
+
+    def message_done(self, level):
+        """
+        Nothing to do, see message_record
+        """
+
+    def flush(self):
+        """
+        Flushes the logfile
+        """
+        self.file.flush()
+
+    def sync(self):
+        """
+        Syncs the logfile and the index
+        """
+        getattr(self.file, 'sync', self.file.flush)()
+        self.index.flush()
+
+    def before_fork(self):
+        """
+        Flushes the logfile and the index, see sinks.before_fork
+        """
+        getattr(self.file, 'before_fork', self.file.flush)()
+        self.index.flush()
+
+    def after_fork(self, suffix):
+        """
+        In a child process: reopens logfile and index per process if
+        suffix is set, and starts counting from the end of the logfile
+        """
+        logfile = reopen(self.file, suffix)
+        if logfile is not self.file:
+            self.file = logfile
+            self.name = getattr(logfile, 'name', None)
+            self.index = reopen(self.index, suffix)
+        self.offset = self._next_entry = _size(self.file)
+
+    def close(self):
+        """
+        Closes logfile and index
+        """
+        self.file.close()
+        self.index.close()
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+def read_compressed(path, method='gzip'):
+    """
+    Returns the content of a file written by CompressedFile, as bytes.
+    A member truncated by a crash is decoded as far as possible.
+    """
+    with open(path, 'rb') as fdesc:
+        data = fdesc.read()
+    chunks = []
+    while data:
+        decompressor = _DECOMPRESSORS[method]()
+        try:
+            chunks.append(decompressor.decompress(data))
+        except (zlib.error, EOFError, IOError, OSError, ValueError):
+            # corrupted tail
+            break
+        data = decompressor.unused_data
+    return b''.join(chunks)
+
+
+# kinds of progress messages (record.monologue_progress), see
+# ProgressAndLog._report
+ITERATION = 'iteration'
+PERCENTAGE = 'percentage'
+
+
+class ScheduledFile(object):
+    """
+    Logfile written by a background thread, so that a slow reader (a pipe,
+    a remote terminal...) does not hold the job up for the sake of dots and
+    progress messages.
+
+    As long as less than `reorder_backlog` bytes of messages are pending,
+    the output is written in order. Beyond, the most important output is
+    written first:
+
+    1. urgent messages: level `urgent_level` or above (msg() by default)
+    2. other messages
+    3. progress messages (iterations, percentages)
+    4. dots
+
+    A pending progress message is always replaced by the next one of the
+    same kind, and more than `raw_dots` pending dots are written as a
+    summary such as ``[.x523 Xx2]``. The job only waits when `max_backlog`
+    bytes of messages are pending. Messages written out of order always
+    begin a line.
+
+    Parameters
+    ----------
+    logfile: open file
+    urgent_level: int, defaults to WARNING
+    reorder_backlog: int, bytes
+    max_backlog: int, bytes
+    raw_dots: int
+    sync_timeout: float, seconds
+        how long sync() (called at exit and upon signals, see flush_all)
+        and close() wait for the thread to write what is pending
+    """
+    def __init__(self, logfile, urgent_level=WARNING, reorder_backlog=1 << 16,
+                 max_backlog=1 << 20, raw_dots=80, sync_timeout=5.):
+        self.file = logfile
+        self.name = getattr(logfile, 'name', None)
+        self.urgent_level = urgent_level
+        self.reorder_backlog = reorder_backlog
+        self.max_backlog = max_backlog
+        self.raw_dots = raw_dots
+        self.sync_timeout = sync_timeout
+        # progress messages replaced before being written
+        self.replaced = 0
+        # dots written as counts
+        self.coalesced = 0
+        self._reset()
+        self._start_thread()
+
+    def _reset(self):
+        """
+        Empty queues
+        """
+        # sequence number of the next output queued
+        self._sequence = 0
+        # (sequence, level, text)
+        self._urgent = deque()
+        self._normal = deque()
+        # [kind, sequence, level, text], oldest first
+        self._progress = []
+        # [sequence, [[dot string, count], ...], ended], oldest first: dots
+        # between two messages make one group
+        self._dot_groups = []
+        # the last group takes the next dots
+        self._dots_open = False
+        self._backlog = 0
+        # chunks of the message being written
+        self._message = None
+        self._progress_kind = None
+        self._busy = False
+        self._line_open = False
+        self._closing = False
+        self._condition = threading.Condition()
+
+    def _start_thread(self):
+        """
+        Starts the writing thread
+        """
+        self._thread = threading.Thread(target=self._run,
+                                        name="monologue-scheduled")
+        self._thread.daemon = True
+        self._thread.start()
+        _THREADED_SINKS[self] = True
+
+    def message_record(self, record):
+        """
+        Called by SinkHandler: notes whether the message reports progress
+        """
+        self._progress_kind = getattr(record, 'monologue_progress', None)
+
+    def message_begin(self, level):
+        """
+        Called by SinkHandler: writes until message_done make a message
+        """
+        self._message = []
+
+    def write(self, data):
+        """
+        Buffers a part of a message, a dot or a line break
+        """
+        if self._message is not None:
+            self._message.append(data)
+            return
+        if data == os.linesep:
+            with self._condition:
+                # lines of dots already written are ended by the thread
+                if self._dots_open:
+                    self._dot_groups[-1][2] = True
+            return
+        self.write_dots(data, 1)
+
+    def write_dots(self, dot_string, count):
+        """
+        Buffers `count` dots written at once (see ProgressAndLog.dot)
+        """
+        if self._message is not None:
+            self._message.append(dot_string * count)
+            return
+        with self._condition:
+            if not self._dots_open:
+                self._dot_groups.append([self._next_sequence(), [], False])
+                self._dots_open = True
+            group = self._dot_groups[-1]
+            # pending lines of dots are merged
+            group[2] = False
+            runs = group[1]
+            if runs and runs[-1][0] == dot_string:
+                runs[-1][1] += count
+            else:
+                runs.append([dot_string, count])
+            self._condition.notify()
+
+    def message_done(self, level):
+        """
+        Called by SinkHandler: queues the message according to its priority
+        """
+        text = ''.join(self._message)
+        self._message = None
+        kind = self._progress_kind
+        self._progress_kind = None
+        with self._condition:
+            # the next dots come after this message
+            self._dots_open = False
+            if kind is not None:
+                for pending in self._progress:
+                    if pending[0] == kind:
+                        self._progress.remove(pending)
+                        self._backlog -= len(pending[3])
+                        self.replaced += 1
+                        break
+                self._progress.append(
+                    [kind, self._next_sequence(), level, text])
+            else:
+                while self._backlog >= self.max_backlog and \
+                        self._thread.is_alive():
+                    self._condition.wait()
+                if level >= self.urgent_level:
+                    queue = self._urgent
+                else:
+                    queue = self._normal
+                queue.append((self._next_sequence(), level, text))
+            self._backlog += len(text)
+            self._condition.notify()
+
+    def _next_sequence(self):
+        """
+        Sequence number of the output being queued
+        """
+        sequence = self._sequence
+        self._sequence += 1
+        return sequence
+
+    def flush(self):
+        """
+        Nothing to do: the thread flushes the logfile when idle.
+        See sync()
+        """
+
+    def sync(self):
+        """
+        Waits until everything pending is written, flushes the logfile.
+        Gives up after sync_timeout seconds, without flushing: the thread
+        writes (and flushes) the rest when the logfile lets it.
+        """
+        deadline = default_timer() + self.sync_timeout
+        with self._condition:
+            while (self._pending() or self._busy) and \
+                    self._thread.is_alive():
+                remaining = deadline - default_timer()
+                if remaining <= 0:
+                    return
+                self._condition.wait(remaining)
+        getattr(self.file, 'sync', self.file.flush)()
+
+    def after_fork(self, suffix):
+        """
+        In a child process: forgets the output of the parent still pending
+        (written by the parent), and starts a writing thread
+        """
+        self._reset()
+        self.file = reopen(self.file, suffix)
+        self._start_thread()
+
+    def close(self):
+        """
+        Writes what is pending (for sync_timeout seconds at most), stops the
+        thread, closes the file
+        """
+        self._stop()
+        self.file.close()
+
+    def _stop(self):
+        """
+        Writes what is pending, stops the thread. Gives up after
+        sync_timeout seconds: the thread is a daemon.
+        """
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self._thread.join(self.sync_timeout)
+
+    def _pending(self):
+        """
+        Whether there is something to write
+        """
+        return bool(self._urgent or self._normal or self._progress or
+                    self._dot_groups)
+
+    def _take(self):
+        """
+        (level, text, dots, ended) of the next output to write: the oldest
+        one, or the most important one if the backlog is too large. None if
+        there is nothing to write.
+        """
+        if self._backlog < self.reorder_backlog:
+            heads = [queue[0][0] for queue in (self._urgent, self._normal)
+                     if queue]
+            if self._progress:
+                heads.append(self._progress[0][1])
+            if self._dot_groups and self._dot_groups[0][0] < min(
+                    heads or [self._sequence]):
+                return self._take_dots(1)
+            if self._urgent and self._urgent[0][0] == min(heads):
+                return self._urgent.popleft()[1:] + (False, False)
+            if self._normal and self._normal[0][0] == min(heads):
+                return self._normal.popleft()[1:] + (False, False)
+        elif self._urgent:
+            return self._urgent.popleft()[1:] + (False, False)
+        elif self._normal:
+            return self._normal.popleft()[1:] + (False, False)
+        if self._progress:
+            kind, sequence, level, text = self._progress.pop(0)
+            return level, text, False, False
+        if self._dot_groups:
+            return self._take_dots(len(self._dot_groups))
+        return None
+
+    def _take_dots(self, number):
+        """
+        (None, text, True, ended) of the `number` oldest groups of dots
+        """
+        groups = self._dot_groups[:number]
+        self._dot_groups = self._dot_groups[number:]
+        if not self._dot_groups:
+            self._dots_open = False
+        ended = groups[-1][2]
+        runs = []
+        for sequence, group_runs, group_ended in groups:
+            for dot_string, count in group_runs:
+                if runs and runs[-1][0] == dot_string:
+                    runs[-1][1] += count
+                else:
+                    runs.append([dot_string, count])
+        total = sum(count for dot_string, count in runs)
+        if total <= self.raw_dots:
+            text = ''.join(dot_string * count for dot_string, count in runs)
+        else:
+            text = "[%s]" % " ".join("%sx%d" % (dot_string, count)
+                                     for dot_string, count in runs)
+            self.coalesced += total
+        return None, text, True, ended
+
+    def _run(self):
+        """
+        Writing thread: the most important output first, one at a time
+        """
+        while True:
+            with self._condition:
+                while not self._pending() and not self._closing:
+                    self._condition.wait()
+                item = self._take()
+                if item is None:
+                    return
+                self._busy = True
+            level, text, dots, ended = item
+            try:
+                if dots:
+                    self.file.write(text)
+                    self._line_open = True
+                    if ended:
+                        self.file.write(os.linesep)
+                        self._line_open = False
+                else:
+                    if self._line_open:
+                        self.file.write(os.linesep)
+                        self._line_open = False
+                    self.file.write(text)
+                    message_done = getattr(self.file, 'message_done', None)
+                    if message_done is not None:
+                        message_done(level)
+                with self._condition:
+                    idle = not self._pending()
+                if idle:
+                    self.file.flush()
+            except (IOError, OSError, ValueError):
+                # broken pipe, closed file: the job goes on
+                pass
+            finally:
+                with self._condition:
+                    if not dots:
+                        self._backlog -= len(text)
+                    self._busy = False
+                    self._condition.notify_all()
+
+
+class CountingStreamHandler(StreamHandler):
+    """
+    StreamHandler counting the characters of the messages it formats,
+    that is of the messages it writes.
+    """
+    def __init__(self, stream=None):
+        StreamHandler.__init__(self, stream)
+        self.chars_written = 0
+
+    def format(self, record):
+        text = StreamHandler.format(self, record)
+        # + line terminator
+        self.chars_written += len(text) + 1
+        return text
+
+
+class SinkHandler(CountingStreamHandler):
+    """
+    StreamHandler telling its sink the level of each message it writes,
+    through sink.message_begin(level) (if defined) and
+    sink.message_done(level). Sinks needing the whole record define
+    sink.message_record(record), called first.
+    Writes happening out of messages are dots and line breaks.
+    """
+    def emit(self, record):
+        message_record = getattr(self.stream, 'message_record', None)
+        if message_record is not None:
+            message_record(record)
+        begin = getattr(self.stream, 'message_begin', None)
+        if begin is not None:
+            begin(record.levelno)
+        CountingStreamHandler.emit(self, record)
+        self.stream.message_done(record.levelno)
@@ -0,0 +1,63 @@
+from StringIO import StringIO
+
+from monologue import get_logger
+
+
+class FakeArray(object):
+    """
+    1-dimension array-like: shape, itemsize and slicing, as numpy arrays
+    """
+    itemsize = 8
+
+    def __init__(self, length):
+        self.shape = (length,)
+        self.nbytes = length * self.itemsize
+
+    def __getitem__(self, key):
+        start, stop, step = key[0].indices(self.shape[0])
+        return FakeArray(stop - start)
+
+
+def test_track_blocks():
+    logfile = StringIO()
+    logger = get_logger("test.track_blocks", logfile=logfile)
+    logger.set_dot_string("x")
+    logger.dot_every(100)
+    logger.percent_print_every(50)
+    sizes = [block.shape[0]
+             for block in logger.track_blocks(FakeArray(1050), 300)]
+    assert sizes == [300, 300, 300, 150]
+    logger.progress_complete()
+    lines = logfile.getvalue().splitlines()
+    # percentages are checked once per block
+    assert lines[:4] == ["xxxxxx", "[test.track_blocks] 50%", "xxxx",
+                         "[test.track_blocks] 100%"]
+    assert lines[4] == \
+        "[test.track_blocks] Successfully completed 1050 iterations"
+    assert lines[5].startswith("[test.track_blocks] Processed 0.0 MB (")
+    assert lines[5].endswith(" MB/s)")
+
+
+def test_progress_array_bytes():
+    logfile = StringIO()
+    logger = get_logger("test.progress_array_bytes", logfile=logfile)
+    logger.dot_every(0)
+    logger.progress_every(1000)
+    logger.progress_array(FakeArray(250), unit='bytes')
+    assert logger._iterations == 2000
+    assert logfile.getvalue().count("Iteration") == 2
+
+
+def test_blocks_and_steps_report_alike():
+    logfile = StringIO()
+    logger = get_logger("test.progress_array_mixed", logfile=logfile)
+    logger.dot_every(0)
+    logger.progress_every(100)
+    for count in range(3):
+        logger.count("errors")
+    logger.progress_array(200)
+    for count in range(100):
+        logger.progress_step()
+    assert logfile.getvalue().splitlines() == [
+        "[test.progress_array_mixed] Iteration %d done (errors 3)" % count
+        for count in (100, 200, 300)]
@@ -0,0 +1,33 @@
+from StringIO import StringIO
+
+from monologue import core, get_logger
+
+
+def test_strides_follow_step_rate():
+    logfile = StringIO()
+    logger = get_logger("test.auto_progress", logfile=logfile)
+    real_timer = core.default_timer
+    # 1000 steps per second
+    core.default_timer = lambda: logger._iterations / 1000.
+    try:
+        logger.auto_progress(dots_per_second=2, lines_per_minute=1)
+        for count in range(200000):
+            logger.progress_step()
+    finally:
+        core.default_timer = real_timer
+    assert logger._dot_every == 500
+    assert logger._progress_every == 50000
+    lines = logfile.getvalue().splitlines()
+    assert "[test.auto_progress] Iteration 50000 done" in lines
+    assert "[test.auto_progress] Iteration 200000 done" in lines
+    # 2 dots per second, 200 seconds, give or take the warmup
+    assert 395 <= logfile.getvalue().count(".") <= 405
+
+
+def test_disabled_keeps_strides():
+    logger = get_logger("test.auto_progress_off", logfile=StringIO())
+    logger.auto_progress(warmup=20)
+    logger.auto_progress(False)
+    for count in range(100):
+        logger.progress_step()
+    assert logger._dot_every == 20
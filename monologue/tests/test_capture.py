@@ -0,0 +1,57 @@
+from logging import INFO, WARNING
+
+from monologue import get_logger
+from monologue.capture import DOT, LINEBREAK, MESSAGE, Capture
+
+
+def test_events():
+    capture = Capture(capacity=2)
+    logger = get_logger("test.capture_events", logfile=capture)
+    logger.dot_every(1)
+    logger.progress_every(2)
+    for count in range(2):
+        logger.progress_step()
+    logger.warning("%s failed", "item 2")
+    assert [event.kind for event in capture.events] == [
+        DOT, DOT, LINEBREAK, MESSAGE, MESSAGE]
+    assert [event.iteration for event in capture.events] == [1, 2, 2, 2, 2]
+    warning = capture.events[-1]
+    assert (warning.level, warning.name, warning.template, warning.args) == \
+        (WARNING, "test.capture_events", "%s failed", ("item 2",))
+    capture.assert_logged("%s failed", level=WARNING)
+    capture.assert_logged("item 2 failed", count=1)
+    capture.assert_not_logged("item 2 failed", level=INFO)
+    assert capture.messages(WARNING) == ["item 2 failed"]
+    try:
+        capture.assert_logged("item 3 failed")
+    except AssertionError as error:
+        assert "item 2 failed" in str(error)
+    else:
+        assert False, "assert_logged passed"
+
+
+def test_text_matches_files():
+    capture = Capture(capacity=2)
+    logger = get_logger("test.capture_text", logfile=capture)
+    logger.set_dot_string("x")
+    logger.msg("hello 1")
+    for count in range(3):
+        logger.progress_step()
+    logger.progress_complete()
+    assert capture.text() == ("[test.capture_text] hello 1\n"
+                              "xxx\n"
+                              "[test.capture_text] Successfully completed 3 "
+                              "iterations\n")
+    capture.clear()
+    assert capture.events == []
+    assert capture.text() == ""
+
+
+def test_dots_written_at_once():
+    capture = Capture()
+    logger = get_logger("test.capture_blocks", logfile=capture)
+    logger.set_dot_string("x")
+    logger.progress_array(10)
+    assert capture.dots() == logger.stats()['dots'] == 10
+    assert capture.dots("x") == 10
+    assert capture.text() == "x" * 10
@@ -0,0 +1,76 @@
+from StringIO import StringIO
+from logging import DEBUG, INFO
+from threading import Thread
+
+from monologue import get_logger
+from monologue.core import PROGRESS, current_logger
+
+
+def test_clone_shares_logfiles():
+    logfile = StringIO()
+    logger = get_logger("test.clone_shared", logfile=logfile)
+    logger.progress_every(2)
+    logger.dot_every(0)
+    child = logger.clone("test.clone.child", verbosity_offset=-10)
+    child.msg("debug from the child", verbosity=DEBUG)
+    logger.msg("debug from the original", verbosity=DEBUG)
+    for count in range(2):
+        child.progress_step()
+    child.count("items")
+    assert logger.iterations() == 0
+    assert logger._counters is None
+    logger.set_offset(+10)
+    child.msg("info from the child", verbosity=INFO)
+    logger.msg("info from the original", verbosity=INFO)
+    assert logfile.getvalue().splitlines() == [
+        "[test.clone.child] debug from the child",
+        "[test.clone.child] Iteration 2 done",
+        "[test.clone.child] info from the child"]
+    assert child.stats()['messages'] == {DEBUG: 1, PROGRESS: 1,
+                                        INFO: 1}
+
+
+def test_copy_on_write():
+    first, second = StringIO(), StringIO()
+    logger = get_logger("test.clone_cow", logfile=first)
+    child = logger.clone()
+    child.add_logfile(second)
+    child.set_dot_string("x")
+    child.dot()
+    logger.dot()
+    child.msg("child")
+    logger.msg("original")
+    assert first.getvalue() == \
+        "x.\n[test.clone_cow] child\n[test.clone_cow] original\n"
+    assert second.getvalue() == "x\n[test.clone_cow] child\n"
+    assert len(logger.logger.handlers) == 1
+
+
+def test_no_methods_per_clone():
+    logger = get_logger("test.clone_methods", logfile=StringIO())
+    logger.flight_recorder()
+    assert 'info' in vars(logger)
+    child = logger.clone()
+    # the methods of the class, no wrapper built for the clone
+    assert not set(vars(child)) & set(['debug', 'info', 'warning',
+                                       'critical', 'log', 'msg'])
+    child.info("from the child")
+    logger.flight_recorder(False)
+    assert 'info' not in vars(logger)
+
+
+def test_current_logger():
+    logger = get_logger("test.current", logfile=StringIO())
+    other = logger.clone("test.current.other")
+    assert current_logger() is None
+    with logger.as_current():
+        assert current_logger() is logger
+        with other.as_current():
+            assert current_logger() is other
+        seen = []
+        thread = Thread(target=lambda: seen.append(current_logger("none")))
+        thread.start()
+        thread.join()
+        assert seen == ["none"]
+        assert current_logger() is logger
+    assert current_logger() is None
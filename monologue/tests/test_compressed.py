@@ -0,0 +1,106 @@
+from StringIO import StringIO
+from io import BytesIO
+from tempfile import mkdtemp
+import gzip
+import os
+import threading
+import time
+
+from monologue import get_logger
+from monologue.sinks import CompressedFile, flush_all, read_compressed
+
+
+def _paths():
+    directory = mkdtemp()
+    return directory, os.path.join(directory, "log.gz")
+
+
+def _cleanup(directory, path):
+    os.unlink(path)
+    os.rmdir(directory)
+
+
+def test_gzip_logfile():
+    directory, path = _paths()
+    logger = get_logger("test.compressed", logfile=StringIO())
+    logger.add_logfile(path, compress='gzip')
+    logger.set_dot_string("x")
+    for count in range(5):
+        logger.msg("Iteration %d done", msgvars=count)
+        logger.dot()
+    flush_all()
+    content = read_compressed(path)
+    assert content.startswith(b"[test.compressed] Iteration 0 done\nx\n")
+    # standard tools read multi-member files
+    assert gzip.open(path).read() == content
+    _cleanup(directory, path)
+
+
+def test_batches_and_truncation():
+    directory, path = _paths()
+    sink = CompressedFile(path, batch_bytes=10)
+    for count in range(100):
+        sink.write("line %d\n" % count)
+        sink.sync()
+    sink.close()
+    expected = "".join("line %d\n" % count for count in range(100))
+    assert read_compressed(path) == expected.encode('ascii')
+    # crash in the middle of the last member
+    with open(path, 'rb') as fdesc:
+        data = fdesc.read()
+    with open(path, 'wb') as fdesc:
+        fdesc.write(data[:-10])
+    assert read_compressed(path).startswith(b"line 0\nline 1\n")
+    _cleanup(directory, path)
+
+
+def test_bz2():
+    directory, path = _paths()
+    sink = CompressedFile(path, method='bz2')
+    sink.write("hello\n")
+    sink.sync()
+    sink.write("world\n")
+    sink.close()
+    assert read_compressed(path, 'bz2') == b"hello\nworld\n"
+    _cleanup(directory, path)
+
+
+class CountingCondition(object):
+    """
+    Condition counting how many times the compressing thread takes it
+    """
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.entered = 0
+
+    def __enter__(self):
+        self.entered += 1
+        return self.condition.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self.condition.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self.condition, name)
+
+
+def test_idle_after_empty_sync():
+    sink = CompressedFile(BytesIO(), max_delay=0.05)
+    condition = sink._condition = CountingCondition()
+    sink.sync()
+    time.sleep(0.3)
+    # about one wake-up per max_delay, not a busy loop
+    assert condition.entered < 20
+    sink.close()
+
+
+def test_default_stdout_not_compressed():
+    logger = get_logger("test.compressed_stdout", logfile=StringIO())
+    for options in ({'compress': 'gzip'}, {'index': True}):
+        try:
+            logger.add_logfile(None, **options)
+        except ValueError:
+            pass
+        else:
+            assert False, "%r ignored" % (options,)
+    assert len(logger._logfiles) == 1
@@ -0,0 +1,268 @@
+from tempfile import mkdtemp
+import json
+import os
+import shutil
+
+from monologue import core
+from monologue import config as config_module
+from monologue.config import configure, reload
+from monologue.core import get_logger
+
+
+def _read(path):
+    with open(path) as logfile:
+        return logfile.read()
+
+
+def _teardown():
+    core._configuration = None
+    for name in list(core._LOGGERS):
+        if name.startswith("test.config"):
+            del core._LOGGERS[name]
+
+
+def test_patterns_and_shared_sinks():
+    directory = mkdtemp()
+    try:
+        main = os.path.join(directory, "main.log")
+        errors = os.path.join(directory, "errors.log")
+        configure({
+            "sinks": {"main": {"path": main},
+                      "errors": {"path": errors, "level": "WARNING",
+                                 "dots": False}},
+            "loggers": {
+                "test.config.*": {"logfiles": ["main", "errors"],
+                                  "verbosity_offset": 10, "dot_every": 0},
+                "test.config.verbose": {"verbosity_offset": -10,
+                                        "progress_every": 2}}})
+        quiet = get_logger("test.config.quiet")
+        verbose = get_logger("test.config.verbose")
+        assert quiet._logfiles == verbose._logfiles
+        quiet.info("not written")
+        quiet.warning("warning")
+        verbose.info("info")
+        for count in range(2):
+            verbose.progress_step()
+        for logfile in quiet._logfiles:
+            logfile.flush()
+        assert _read(main).splitlines() == [
+            "[test.config.quiet] warning",
+            "[test.config.verbose] info",
+            "[test.config.verbose] Iteration 2 done"]
+        assert _read(errors) == "[test.config.quiet] warning\n"
+    finally:
+        _teardown()
+        shutil.rmtree(directory)
+
+
+def test_reload_keeps_unchanged_sinks():
+    directory = mkdtemp()
+    try:
+        path = os.path.join(directory, "logging.json")
+        config = {"sinks": {"main": {"path": os.path.join(directory, "a")}},
+                  "loggers": {"test.config.*": {"logfiles": ["main"],
+                                                "dot_every": 0}}}
+        with open(path, 'w') as fdesc:
+            json.dump(config, fdesc)
+        configure(path)
+        logger = get_logger("test.config.reload")
+        logfile = logger._logfiles[0]
+        handler = logger.logger.handlers[0]
+
+        config["loggers"]["test.config.*"]["verbosity_offset"] = 10
+        config["sinks"]["other"] = {"path": os.path.join(directory, "b")}
+        with open(path, 'w') as fdesc:
+            json.dump(config, fdesc)
+        reload()
+        assert logger.offset() == 10
+        assert logger._logfiles == [logfile]
+        assert logger.logger.handlers == [handler]
+        assert not logfile.closed
+
+        # same file, other format: the file is kept open
+        config["sinks"]["main"]["timestamp"] = True
+        with open(path, 'w') as fdesc:
+            json.dump(config, fdesc)
+        reload()
+        assert logger._logfiles == [logfile]
+        assert logger.logger.handlers != [handler]
+        assert not logfile.closed
+
+        # invalid: nothing changes
+        config["loggers"]["test.config.*"]["logfiles"] = ["missing"]
+        with open(path, 'w') as fdesc:
+            json.dump(config, fdesc)
+        try:
+            reload()
+        except ValueError:
+            pass
+        else:
+            assert False, "invalid configuration accepted"
+        assert logger._logfiles == [logfile]
+
+        # sink replaced: the old one is closed once unused
+        config["loggers"]["test.config.*"]["logfiles"] = ["other"]
+        del config["sinks"]["main"]
+        with open(path, 'w') as fdesc:
+            json.dump(config, fdesc)
+        reload()
+        assert logger._logfiles != [logfile]
+        assert logfile.closed
+    finally:
+        _teardown()
+        shutil.rmtree(directory)
+
+
+def test_reload_keeps_sinks_of_clones():
+    directory = mkdtemp()
+    try:
+        config = {"sinks": {"main": {"path": os.path.join(directory, "a")}},
+                  "loggers": {"test.config.*": {"logfiles": ["main"],
+                                                "dot_every": 0}}}
+        configure(config)
+        logger = get_logger("test.config.clones")
+        clone = logger.clone("test.config.clones.request")
+        logfile = logger._logfiles[0]
+
+        config["sinks"] = {"other": {"path": os.path.join(directory, "b")}}
+        config["loggers"]["test.config.*"]["logfiles"] = ["other"]
+        configure(config)
+        assert logger._logfiles != [logfile]
+        # still written to by the clone
+        assert not logfile.closed
+        clone.info("from the clone")
+        logfile.flush()
+        assert _read(os.path.join(directory, "a")) == \
+            "[test.config.clones.request] from the clone\n"
+    finally:
+        _teardown()
+        shutil.rmtree(directory)
+
+
+def test_reload_loses_no_message():
+    directory = mkdtemp()
+    try:
+        main = os.path.join(directory, "main.log")
+        config = {"sinks": {"main": {"path": main}},
+                  "loggers": {"test.config.*": {"logfiles": ["main"],
+                                                "dot_every": 0}}}
+        configure(config)
+        logger = get_logger("test.config.swap")
+
+        # the handler of the new settings of the sink replaces the old one
+        # in one step
+        config["sinks"]["main"]["timestamp"] = True
+        original = core.ProgressAndLog._new_handler
+
+        def new_handler(self, *args):
+            handler = original(self, *args)
+            if self is logger:
+                self.info("during the swap")
+            return handler
+        core.ProgressAndLog._new_handler = new_handler
+        try:
+            configure(config)
+        finally:
+            core.ProgressAndLog._new_handler = original
+        logger.info("after the swap")
+        assert len(logger.logger.handlers) == 1
+        assert len(logger._logfiles) == 1
+        logger._logfiles[0].flush()
+        lines = _read(main).splitlines()
+        assert len(lines) == 2
+        assert lines[0] == "[test.config.swap] during the swap"
+        assert lines[1].endswith("][test.config.swap] after the swap")
+    finally:
+        _teardown()
+        shutil.rmtree(directory)
+
+
+def test_reload_signal_waits_for_configure():
+    directory = mkdtemp()
+    try:
+        path = os.path.join(directory, "logging.json")
+        config = {"loggers": {"test.config.*": {"dot_every": 0}}}
+        with open(path, 'w') as fdesc:
+            json.dump(config, fdesc)
+        configure(path)
+        logger = get_logger("test.config.signal")
+        config["loggers"]["test.config.*"]["dot_every"] = 5
+        with open(path, 'w') as fdesc:
+            json.dump(config, fdesc)
+        # the signal interrupts configure(), which holds the lock
+        with config_module._LOCK:
+            thread = config_module._reload_handler(None, None)
+            thread.join(0.05)
+            assert logger._dot_every == 0
+        thread.join()
+        assert logger._dot_every == 5
+    finally:
+        _teardown()
+        shutil.rmtree(directory)
+
+
+def test_failed_apply_changes_nothing():
+    directory = mkdtemp()
+    try:
+        main = os.path.join(directory, "main.log")
+        other = os.path.join(directory, "other.log")
+        configure({"sinks": {"main": {"path": main}},
+                   "loggers": {"test.config.*": {"logfiles": ["main"],
+                                                 "dot_every": 0}}})
+        first = get_logger("test.config.first")
+        second = get_logger("test.config.second")
+        handlers = dict((logger, logger.logger.handlers)
+                        for logger in (first, second))
+        logfiles = first._logfiles
+        previous = core._configuration
+
+        # the second logger fails once the first one has been changed
+        original = config_module._Configuration.apply
+
+        def apply(self, logger, settings):
+            if logger in (first, second) and applied:
+                raise RuntimeError("failed")
+            if logger in (first, second):
+                applied.append(logger)
+            original(self, logger, settings)
+        applied = []
+        config_module._Configuration.apply = apply
+        try:
+            configure({"sinks": {"other": {"path": other}},
+                       "loggers": {"test.config.*": {"logfiles": ["other"],
+                                                     "dot_every": 7}}})
+        except RuntimeError:
+            pass
+        else:
+            assert False, "no error"
+        finally:
+            config_module._Configuration.apply = original
+        assert applied
+        assert core._configuration is previous
+        for logger in (first, second):
+            assert logger._dot_every == 0
+            assert logger._logfiles == logfiles
+            assert logger.logger.handlers is handlers[logger]
+        first.info("still there")
+        logfiles[0].flush()
+        assert _read(main) == "[test.config.first] still there\n"
+    finally:
+        _teardown()
+        shutil.rmtree(directory)
+
+
+def test_unmatched_loggers_are_left_alone():
+    directory = mkdtemp()
+    try:
+        main = os.path.join(directory, "main.log")
+        configure({"sinks": {"main": {"path": main}},
+                   "loggers": {"test.config.*": {"logfiles": ["main"],
+                                                 "dot_every": 0}}})
+        logger = get_logger("test.config.left")
+        logfiles = logger._logfiles
+        configure({"loggers": {"other.*": {"dot_every": 3}}})
+        assert logger._dot_every == 0
+        assert logger._logfiles == logfiles
+    finally:
+        _teardown()
+        shutil.rmtree(directory)
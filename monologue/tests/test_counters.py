@@ -0,0 +1,46 @@
+from StringIO import StringIO
+
+from monologue import get_logger
+
+
+def test_counters_in_progress_messages():
+    logfile = StringIO()
+    logger = get_logger("test.counters", logfile=logfile)
+    logger.dot_every(0)
+    logger.percent_print_every(50)
+    logger.progress_every(3)
+    logger.percent_target(4)
+    for count in range(4):
+        logger.count("read")
+        if count % 2:
+            logger.count("written")
+        else:
+            logger.count("errors")
+        logger.progress_step()
+    assert logger.stats()['counters'] == {'read': 4, 'written': 2,
+                                          'errors': 2}
+    logger.progress_complete()
+    assert logfile.getvalue().splitlines() == [
+        "[test.counters] 0% (read 1, errors 1)",
+        "[test.counters] 50% (read 2, errors 1, written 1)",
+        "[test.counters] Iteration 3 done (read 3, errors 2, written 1)",
+        "[test.counters] 100% (read 4, errors 2, written 2)",
+        "[test.counters] Successfully completed 4 iterations "
+        "(read 4, errors 2, written 2)"]
+    # reset, order kept
+    logger.count("written", 5)
+    assert logger.stats()['counters'] == {'read': 0, 'written': 5,
+                                          'errors': 0}
+    logger.progress_reset()
+    assert logger.stats()['counters']['written'] == 0
+
+
+def test_counters_beyond_32_bits():
+    logfile = StringIO()
+    logger = get_logger("test.counters_large", logfile=logfile)
+    logger.count("bytes", 3 * 2 ** 31)
+    logger.count("bytes", 2 ** 32)
+    assert logger.stats()['counters'] == {'bytes': 5 * 2 ** 31}
+    assert not isinstance(logger.stats()['counters']['bytes'], float)
+    logger.progress_complete()
+    assert "(bytes 10737418240)" in logfile.getvalue()
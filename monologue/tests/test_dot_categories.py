@@ -0,0 +1,71 @@
+from StringIO import StringIO
+
+from monologue import get_logger
+
+
+class _Terminal(StringIO):
+    def isatty(self):
+        return True
+
+
+def _outcome(count):
+    if count % 100 == 7:
+        return "X"
+    return "."
+
+
+def test_summaries_at_boundaries():
+    logfile = StringIO()
+    logger = get_logger("test.dot_categories", logfile=logfile)
+    logger.dot_every(1)
+    logger.progress_every(500)
+    logger.categorical_dots()
+    for count in range(1000):
+        logger.progress_step()
+        if _outcome(count) == "X":
+            logger.dot(dot_string="X")
+    logger.dot(dot_string="R")
+    logger.progress_complete()
+    assert logfile.getvalue().splitlines() == [
+        "[.x500 Xx5]",
+        "[test.dot_categories] Iteration 500 done",
+        "[.x500 Xx5]",
+        "[test.dot_categories] Iteration 1000 done",
+        "[Rx1]",
+        "[test.dot_categories] Successfully completed 1000 iterations"]
+    assert logger.stats()['dots'] == 1011
+
+
+def test_window_and_terminal():
+    logfile = StringIO()
+    terminal = _Terminal()
+    logger = get_logger("test.dot_categories_tty", logfile=logfile)
+    logger.add_logfile(terminal)
+    logger.categorical_dots(window=4)
+    for count in range(10):
+        logger.dot(dot_string=str(count % 2))
+    assert logfile.getvalue() == "[0x2 1x2][0x2 1x2]"
+    assert terminal.getvalue() == "0101010101"
+    logger.categorical_dots(False)
+    assert logfile.getvalue().endswith("[0x1 1x1]")
+    assert 'dot' not in vars(logger)
+    logger.dot()
+    assert terminal.getvalue().endswith("01.")
+
+
+def test_composes_with_other_features():
+    logfile = StringIO()
+    logger = get_logger("test.dot_categories_compose", logfile=logfile)
+    logger.categorical_dots(raw_on_tty=False)
+    logger.instrument()
+    logger.track_latency()
+    logger.categorical_dots(False)
+    logger.dot()
+    assert logfile.getvalue() == "."
+    assert logger._instrumentation.slots['dot'][0] == 1
+    logger.instrument(False)
+    logger.dot()
+    assert logfile.getvalue() == ".."
+    logger.track_latency(False)
+    assert 'dot' not in vars(logger)
+    assert 'progress_step' not in vars(logger)
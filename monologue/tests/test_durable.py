@@ -0,0 +1,78 @@
+from StringIO import StringIO
+from logging import WARNING
+from tempfile import mkdtemp
+import os
+
+from monologue import FlushPolicy, flush_all, get_logger
+from monologue import sinks
+
+
+class CountingFile(StringIO):
+    flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+
+
+def test_every_message():
+    logfile = CountingFile()
+    logger = get_logger("test.durable_message", logfile=StringIO())
+    logger.add_logfile(logfile, flush_policy=FlushPolicy())
+    logger.msg("hello")
+    logger.msg("world")
+    assert logfile.flushes == 2
+
+
+def test_every_bytes():
+    policy = FlushPolicy(every_message=False, every_bytes=10)
+    logfile = CountingFile()
+    logger = get_logger("test.durable_bytes", logfile=StringIO())
+    logger.add_logfile(logfile, flush_policy=policy)
+    for count in range(25):
+        logger.dot()
+    assert logfile.flushes == 2
+
+
+def test_level():
+    policy = FlushPolicy(every_message=False, level=WARNING)
+    logfile = CountingFile()
+    logger = get_logger("test.durable_level", logfile=StringIO())
+    logger.add_logfile(logfile, flush_policy=policy)
+    logger.info("not flushed")
+    assert logfile.flushes == 0
+    logger.warning("flushed")
+    assert logfile.flushes == 1
+
+
+def test_every_seconds():
+    policy = FlushPolicy(every_message=False, every_seconds=0)
+    logfile = CountingFile()
+    logger = get_logger("test.durable_seconds", logfile=StringIO())
+    logger.add_logfile(logfile, flush_policy=policy)
+    logger.dot()
+    assert logfile.flushes == 1
+
+
+def test_fsync_group_commit():
+    fsyncs = []
+    directory = mkdtemp()
+    filename = os.path.join(directory, "durable.log")
+    policy = FlushPolicy(fsync=True, fsync_every=3600)
+    logger = get_logger("test.durable_fsync", logfile=filename)
+    logger.add_logfile(filename, flush_policy=policy)
+    sinks._fsync = fsyncs.append
+    try:
+        logger.info("first")  # first fsync period is not over
+        logger.info("second")
+        assert fsyncs == []
+        logger.warning("error")
+        assert len(fsyncs) == 1
+        logger.info("third")
+        flush_all()
+        assert len(fsyncs) == 2
+    finally:
+        sinks._fsync = os.fsync
+        for handler in logger.logger.handlers:
+            handler.stream.close()
+        os.unlink(filename)
+        os.rmdir(directory)
@@ -0,0 +1,73 @@
+from StringIO import StringIO
+from logging import DEBUG, ERROR, INFO
+
+from monologue import get_logger
+
+
+def test_replay_on_error():
+    logfile = StringIO()
+    logger = get_logger("test.recorder", logfile=logfile)
+    logger.flight_recorder(size=2)
+    logger.debug("debug %s", 1)
+    logger.msg("msg %(key)s", verbosity=DEBUG, msgvars={'key': 2})
+    logger.msg("msg %s %s", verbosity=False, msgvars=(3, 4))
+    logger.info("shown")
+    logger.log(ERROR, "failure")
+    assert logfile.getvalue() == (
+        "[test.recorder] shown\n"
+        "[test.recorder] Flight recorder: last 2 suppressed messages\n"
+        "[test.recorder] msg 2\n"
+        "[test.recorder] msg 3 4\n"
+        "[test.recorder] failure\n")
+
+
+def test_default_verbosity_does_not_replay():
+    logfile = StringIO()
+    logger = get_logger("test.recorder_msg", logfile=logfile)
+    logger.flight_recorder()
+    logger.debug("kept")
+    logger.msg("always printed")
+    assert "kept" not in logfile.getvalue()
+    logger.critical("critical")
+    assert "kept" in logfile.getvalue()
+
+
+def test_nothing_formatted():
+    class Unformattable(object):
+        def __str__(self):
+            raise AssertionError("formatted")
+
+    logfile = StringIO()
+    logger = get_logger("test.recorder_lazy", logfile=logfile)
+    logger.flight_recorder()
+    logger.debug("lazy %s", Unformattable())
+    assert logger._recorder.stored == 1
+
+
+def test_trigger_level():
+    logfile = StringIO()
+    logger = get_logger("test.recorder_trigger", logfile=logfile)
+    logger.flight_recorder(trigger_level=INFO)
+    logger.debug("kept")
+    logger.info("info")
+    assert logfile.getvalue().endswith(
+        "[test.recorder_trigger] kept\n[test.recorder_trigger] info\n")
+
+
+def test_fixed_level_logfile():
+    logfile = StringIO()
+    logger = get_logger("test.recorder_fixed", logfile=logfile)
+    logger.flight_recorder(size=10)
+    debug_logfile = StringIO()
+    logger.add_logfile(debug_logfile, level=DEBUG)
+    logger.debug("detail")
+    assert logfile.getvalue() == ""
+    assert debug_logfile.getvalue() == "[test.recorder_fixed] detail\n"
+    logger.log(ERROR, "failure")
+    assert logfile.getvalue() == (
+        "[test.recorder_fixed] Flight recorder: last 1 suppressed messages\n"
+        "[test.recorder_fixed] detail\n"
+        "[test.recorder_fixed] failure\n")
+    assert debug_logfile.getvalue() == (
+        "[test.recorder_fixed] detail\n"
+        "[test.recorder_fixed] failure\n")
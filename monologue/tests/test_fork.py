@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import traceback
+from unittest import SkipTest
+
+import monologue
+from monologue import get_logger, sinks
+
+
+def _fork(child):
+    """
+    Runs child() in a child process (with the fork hooks), waits for it
+    """
+    if not hasattr(os, 'fork'):
+        raise SkipTest("os.fork is not available")
+    manual_hooks = not hasattr(os, 'register_at_fork')
+    if manual_hooks:
+        monologue.before_fork()
+    pid = os.fork()
+    if not pid:
+        status = 1
+        try:
+            if manual_hooks:
+                monologue.after_fork()
+            child()
+            status = 0
+        except Exception:
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+    assert os.waitpid(pid, 0)[1] == 0
+    return pid
+
+
+def test_no_duplicated_output():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "job.log")
+        logger = get_logger("test.fork", logfile=path)
+        logger.dot_every(1)
+        logger.progress_every(0)
+        logger.progress_step()
+        logger.progress_step()
+
+        def child():
+            logger.progress_step()
+            logger.info("child")
+            assert logger.iterations() == 1
+            assert logger.stats()['dots'] == 1
+            logger.logger.handlers[0].flush()
+
+        _fork(child)
+        logger.progress_step()
+        logger.info("parent")
+        logger.logger.handlers[0].flush()
+        with open(path) as logfile:
+            lines = logfile.read().splitlines()
+        # the line of dots of the parent is not ended by the fork
+        assert lines == ["...", "[test.fork] child", ".",
+                         "[test.fork] parent"]
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_reopen_per_pid():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "job.log")
+        logger = get_logger("test.fork_reopen", logfile=path)
+        logger.info("parent")
+        ring = monologue.RingBufferFile(path + ".ring", 4096)
+        logger.add_logfile(ring, dots=False)
+        compressed = os.path.join(directory, "job.log.gz")
+        logger.add_logfile(compressed, dots=False, compress='gzip')
+
+        def child():
+            logger.info("child")
+            for handler in logger.logger.handlers:
+                handler.flush()
+                getattr(handler.stream, 'sync', handler.stream.flush)()
+
+        sinks.reopen_per_pid()
+        try:
+            pid = _fork(child)
+        finally:
+            sinks.reopen_per_pid(False)
+        logger.info("parent again")
+        monologue.flush_all()
+        suffix = ".%d" % pid
+        with open(path + suffix) as logfile:
+            assert logfile.read() == "[test.fork_reopen] child\n"
+        with open(path) as logfile:
+            assert logfile.read().splitlines() == [
+                "[test.fork_reopen] parent", "[test.fork_reopen] parent again"]
+        assert monologue.read_ring(path + ".ring" + suffix) == \
+            b"[test.fork_reopen] child\n"
+        assert sinks.read_compressed(compressed + suffix) == \
+            b"[test.fork_reopen] child\n"
+        assert sinks.read_compressed(compressed) == \
+            b"[test.fork_reopen] parent again\n"
+        ring.close()
+        for handler in logger.logger.handlers:
+            handler.stream.close()
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,92 @@
+from StringIO import StringIO
+from logging import Filter
+from tempfile import mkdtemp
+import os
+import shutil
+import time
+
+from monologue.core import ProgressAndLog
+from monologue.logread import parse_time, read_index, read_range
+
+# 2026-10-19 03:00:00, local time
+_START = time.mktime((2026, 10, 19, 3, 0, 0, 0, 0, -1))
+
+
+class _FakeClock(Filter):
+    """
+    Dates the records one second apart, or `per_second` records per second
+    """
+    def __init__(self, per_second=1):
+        Filter.__init__(self)
+        self.per_second = per_second
+        self.count = 0
+
+    def filter(self, record):
+        record.created = _START + self.count // self.per_second
+        record.msecs = 0
+        self.count += 1
+        return True
+
+
+def _write_log(path, count, index=100, per_second=1):
+    logger = ProgressAndLog("test.logread", 0, logfile=StringIO())
+    logger.add_logfile(path, index=index, timestamp=True)
+    logger.logger.addFilter(_FakeClock(per_second))
+    for number in range(count):
+        logger.info("message %d", number)
+    logger.logger.handlers[-1].stream.close()
+
+
+def test_time_range():
+    directory = mkdtemp()
+    try:
+        path = os.path.join(directory, "job.log")
+        _write_log(path, 1000)
+        entries = read_index(path + '.idx')
+        assert 10 < len(entries) < 1000
+        assert entries[0][1] == 0
+        assert all(name == "test.logread" for created, offset, name in entries)
+        lines = list(read_range(path, _START + 500, "2026-10-19 03:08:30"))
+        assert len(lines) == 10
+        assert lines[0].endswith(b"[test.logread] message 500\n")
+        assert lines[-1].endswith(b"[test.logread] message 509\n")
+        assert len(list(read_range(path, start=_START + 990))) == 10
+        assert len(list(read_range(path, end=_START + 5))) == 5
+        assert list(read_range(path, _START, name="test.other")) == []
+        assert len(list(read_range(path, _START, _START + 3,
+                                   name="test"))) == 3
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_same_second():
+    directory = mkdtemp()
+    try:
+        path = os.path.join(directory, "job.log")
+        _write_log(path, 400, per_second=200)
+        # several index entries share each second
+        assert len(read_index(path + '.idx')) > 4
+        lines = list(read_range(path, _START + 1))
+        assert len(lines) == 200
+        assert lines[0].endswith(b"[test.logread] message 200\n")
+        assert len(list(read_range(path, _START, _START + 1))) == 200
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_without_index():
+    directory = mkdtemp()
+    try:
+        path = os.path.join(directory, "job.log")
+        _write_log(path, 100)
+        os.unlink(path + '.idx')
+        lines = list(read_range(path, _START + 50, _START + 52))
+        assert [line[-11:] for line in lines] == [b"message 50\n",
+                                                  b"message 51\n"]
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_parse_time():
+    assert parse_time("2026-10-19 03:00") == _START
+    assert parse_time(12.5) == 12.5
@@ -0,0 +1,86 @@
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+from unittest import SkipTest
+import time
+
+from monologue import get_logger
+
+
+def _require_futures():
+    try:
+        import concurrent.futures
+    except ImportError:
+        raise SkipTest("concurrent.futures is not available")
+
+
+def _square(value):
+    return value * value
+
+
+def _square_and_talk(value):
+    if value == 5:
+        get_logger("test.parallel_processes").msg("five")
+    return value * value
+
+
+def test_map_threads():
+    _require_futures()
+    logfile = StringIO()
+    logger = get_logger("test.parallel_threads", logfile=logfile)
+    logger.dot_every(0)
+    logger.progress_every(10)
+    results = logger.map(_square, range(25), workers=3, chunksize=4)
+    assert list(results) == [value * value for value in range(25)]
+    assert logger._iterations == 25
+    assert logfile.getvalue().count("Iteration") == 2
+
+
+def test_imap_unordered():
+    _require_futures()
+    logfile = StringIO()
+    logger = get_logger("test.parallel_unordered", logfile=logfile)
+    logger.dot_every(0)
+    logger.progress_every(10)
+    results = logger.imap_unordered(_square, range(25), workers=3)
+    assert sorted(results) == [value * value for value in range(25)]
+
+
+def test_map_processes_routes_messages():
+    _require_futures()
+    logfile = StringIO()
+    logger = get_logger("test.parallel_processes", logfile=logfile)
+    logger.dot_every(0)
+    logger.progress_every(10)
+    results = list(logger.map(_square_and_talk, range(12), workers=2, chunksize=4,
+                              processes=True))
+    assert results == [value * value for value in range(12)]
+    assert logfile.getvalue() == "[test.parallel_processes] five\n" \
+        "[test.parallel_processes] Iteration 10 done\n"
+
+
+class SlowFile(StringIO):
+    """
+    Gives the other threads a chance to run in the middle of each write
+    """
+    def write(self, data):
+        time.sleep(0.0001)
+        StringIO.write(self, data)
+
+
+def test_map_threads_serializes_output():
+    _require_futures()
+    logfile = SlowFile()
+    logger = get_logger("test.parallel_serialized", logfile=logfile)
+
+    def work(value):
+        logger.dot()
+        logger.msg("item %d", msgvars=value)
+        return value
+
+    assert list(logger.map(work, range(200), workers=4)) == list(range(200))
+    for line in logfile.getvalue().splitlines():
+        assert line.startswith("[test.parallel_serialized]") or \
+            line == "." * len(line), line
+    assert 'dot' not in vars(logger)
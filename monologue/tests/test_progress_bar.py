@@ -0,0 +1,78 @@
+from StringIO import StringIO
+
+from monologue import get_logger
+
+
+class FakeTTY(StringIO):
+    def isatty(self):
+        return True
+
+
+def test_bar_replaces_dots():
+    tty = FakeTTY()
+    logger = get_logger("test.bar", logfile=tty)
+    logger.progress_bar(refresh_rate=1e9)
+    logger.set_dot_string("x")
+    logger.percent_target(10)
+    for count in range(10):
+        logger.progress_step()
+    logger.progress_complete()
+    output = tty.getvalue()
+    assert "x" not in output
+    assert "\r[" + "#" * 30 + "] 100% 10/10" in output
+    assert output.endswith("[test.bar] Successfully completed 10 iterations\n")
+
+
+def test_bar_throttled():
+    tty = FakeTTY()
+    logger = get_logger("test.bar_throttled", logfile=tty)
+    logger.progress_bar(refresh_rate=1e-9)
+    for count in range(1000):
+        logger.progress_step()
+    assert tty.getvalue().count("\r") == 1
+
+
+def test_bar_around_text():
+    tty = FakeTTY()
+    logger = get_logger("test.bar_text", logfile=tty)
+    logger.progress_bar(refresh_rate=1e9)
+    logger.progress_step()
+    logger.msg("hello")
+    output = tty.getvalue()
+    status, blank, after = output.split("\r", 3)[1:]
+    assert status.startswith("1 it")
+    assert blank.strip() == ""
+    assert after.startswith("[test.bar_text] hello\n")
+
+
+def test_bar_without_dots():
+    tty = FakeTTY()
+    logger = get_logger("test.bar_nodots", logfile=tty)
+    logger.progress_bar(refresh_rate=1e9)
+    logger.dot_every(0)
+    logger.percent_target(10)
+    for count in range(5):
+        logger.progress_step()
+    assert "]  50% 5/10 " in tty.getvalue()
+    logger.progress_array(5)
+    assert "] 100% 10/10" in tty.getvalue()
+
+
+def test_non_tty_keeps_dots():
+    logfile = StringIO()
+    logger = get_logger("test.bar_notty", logfile=logfile)
+    logger.progress_bar()
+    for count in range(3):
+        logger.progress_step()
+    assert logfile.getvalue() == "..."
+
+
+def test_disable_keeps_order():
+    first, tty, last = StringIO(), FakeTTY(), StringIO()
+    logger = get_logger("test.bar_order", logfile=first)
+    logger.add_logfile(tty)
+    logger.add_logfile(last)
+    logger.progress_bar()
+    assert logger._dot_logfiles == [first, last]
+    logger.progress_bar(False)
+    assert logger._dot_logfiles == [first, tty, last]
@@ -0,0 +1,90 @@
+from StringIO import StringIO
+import time
+
+from monologue import flush_all, get_logger
+
+
+def test_collapse():
+    logfile = StringIO()
+    logger = get_logger("test.repeats", logfile=logfile)
+    logger.collapse_repeats()
+    for count in range(5):
+        logger.warning("upstream says %s", "no")
+    logger.msg("upstream says %s", msgvars="no")
+    logger.msg("something else")
+    assert logfile.getvalue() == (
+        "[test.repeats] upstream says no\n"
+        "[test.repeats] last message repeated 4 times\n"
+        "[test.repeats] upstream says no\n"
+        "[test.repeats] something else\n")
+
+
+def test_different_args_not_collapsed():
+    logfile = StringIO()
+    logger = get_logger("test.repeats_args", logfile=logfile)
+    logger.collapse_repeats()
+    logger.msg("value %s", msgvars=1)
+    logger.msg("value %s", msgvars=2)
+    assert logfile.getvalue().count("value") == 2
+
+
+def test_flushed_on_complete():
+    logfile = StringIO()
+    logger = get_logger("test.repeats_complete", logfile=logfile)
+    logger.collapse_repeats()
+    logger.dot_every(0)
+    logger.msg("same")
+    logger.msg("same")
+    logger.progress_complete()
+    assert logfile.getvalue() == (
+        "[test.repeats_complete] same\n"
+        "[test.repeats_complete] last message repeated 1 times\n"
+        "[test.repeats_complete] Successfully completed 0 iterations\n")
+
+
+def test_time_bound():
+    logfile = StringIO()
+    logger = get_logger("test.repeats_delay", logfile=logfile)
+    logger.collapse_repeats(max_delay=0)
+    for count in range(3):
+        logger.msg("same")
+    assert logfile.getvalue().count("last message repeated 1 times") == 2
+
+
+def test_per_logfile():
+    first, second = StringIO(), StringIO()
+    logger = get_logger("test.repeats_sinks", logfile=first)
+    logger.collapse_repeats()
+    logger.add_logfile(second)
+    logger.msg("same")
+    logger.msg("same")
+    logger.msg("other")
+    assert first.getvalue() == second.getvalue()
+    assert "repeated 1 times" in second.getvalue()
+
+
+def test_burst_then_silence():
+    logfile = StringIO()
+    logger = get_logger("test.repeats_burst", logfile=logfile)
+    logger.collapse_repeats(max_delay=0.01)
+    for count in range(3):
+        logger.warning("disk full")
+    time.sleep(0.02)
+    # no other message: the count is written upon the next dot...
+    logger.dot()
+    assert logfile.getvalue() == (
+        "[test.repeats_burst] disk full\n"
+        "[test.repeats_burst] last message repeated 2 times\n.")
+
+    logfile = StringIO()
+    logger = get_logger("test.repeats_silence", logfile=logfile)
+    logger.collapse_repeats()
+    for count in range(3):
+        logger.warning("disk full")
+    logger.dot()
+    # ...once max_delay is over, and in any case by flush_all
+    assert "repeated" not in logfile.getvalue()
+    flush_all()
+    assert logfile.getvalue() == (
+        "[test.repeats_silence] disk full\n."
+        "\n[test.repeats_silence] last message repeated 2 times\n")
@@ -0,0 +1,50 @@
+from StringIO import StringIO
+from tempfile import mkdtemp
+import os
+
+from monologue import get_logger
+
+
+def test_resume_percentages():
+    directory = mkdtemp()
+    path = os.path.join(directory, "job.progress")
+    logger = get_logger("test.resume_killed", logfile=StringIO())
+    logger.dot_every(0)
+    logger.percent_print_every(25)
+    logger.percent_target(100)
+    logger.resume_from(path, interval=0)
+    for count in range(60):
+        logger.progress_step()
+    # the job is killed here: last checkpoint at the 50% boundary
+    logger._checkpoint.wait()
+    assert os.listdir(directory) == ["job.progress"]
+
+    # restarted
+    logfile = StringIO()
+    logger = get_logger("test.resume", logfile=logfile)
+    logger.dot_every(0)
+    logger.percent_print_every(25)
+    logger.percent_target(100)
+    assert logger.resume_from(path, interval=0)
+    assert logger.iterations() == 50
+    for count in range(50):
+        logger.progress_step()
+    assert logfile.getvalue() == "[test.resume] 75%\n[test.resume] 100%\n"
+    logger.progress_complete()
+    assert not os.path.exists(path)
+    os.rmdir(directory)
+
+
+def test_unreadable_checkpoint():
+    directory = mkdtemp()
+    path = os.path.join(directory, "job.progress")
+    logger = get_logger("test.resume_unreadable", logfile=StringIO())
+    for content in ("{\"iterations\": 1", "{}", "[]"):
+        with open(path, 'w') as fdesc:
+            fdesc.write(content)
+        # starts afresh
+        assert not logger.resume_from(path)
+        assert logger.iterations() == 0
+    logger.progress_complete()
+    assert not os.path.exists(path)
+    os.rmdir(directory)
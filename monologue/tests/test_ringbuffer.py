@@ -0,0 +1,59 @@
+from StringIO import StringIO
+from logging import DEBUG, ERROR
+from tempfile import mkdtemp
+import os
+
+from monologue import get_logger
+from monologue.ringbuffer import RingBufferFile, read_ring
+
+
+def _ring_path():
+    return os.path.join(mkdtemp(), "test.ring")
+
+
+def _cleanup(path):
+    os.unlink(path)
+    os.rmdir(os.path.dirname(path))
+
+
+def test_wraparound():
+    path = _ring_path()
+    ring = RingBufferFile(path, 100)
+    for count in range(50):
+        ring.write("line %d\n" % count)
+    ring.close()
+    lines = read_ring(path).decode('utf-8').splitlines()
+    assert lines[-1] == "line 49"
+    assert 0 < len(lines) < 50
+    assert lines == ["line %d" % count for count in range(50 - len(lines), 50)]
+    _cleanup(path)
+
+
+def test_max_bytes_and_reopen():
+    path = _ring_path()
+    ring = RingBufferFile(path, 1000)
+    ring.write("first\n")
+    ring.close()
+    ring = RingBufferFile(path, 1000)
+    ring.write("second\n")
+    assert read_ring(path) == b"first\nsecond\n"
+    assert ring.read(7) == b"second\n"
+    ring.close()
+    _cleanup(path)
+
+
+def test_debug_always_on():
+    path = _ring_path()
+    stdout = StringIO()
+    logger = get_logger("test.ring_level", logfile=stdout)
+    ring = RingBufferFile(path, 4096, dump_to=StringIO())
+    logger.add_logfile(ring, dots=False, level=DEBUG)
+    logger.debug("debug")
+    logger.info("info")
+    logger.msg("error", verbosity=ERROR)
+    assert stdout.getvalue() == "[test.ring_level] info\n" \
+        "[test.ring_level] error\n"
+    assert ring.dump_to.getvalue() == "[test.ring_level] debug\n" \
+        "[test.ring_level] info\n[test.ring_level] error\n"
+    ring.close()
+    _cleanup(path)
@@ -0,0 +1,137 @@
+import threading
+from logging import INFO
+from StringIO import StringIO
+
+from monologue import get_logger
+from monologue.sinks import ScheduledFile
+
+
+class BlockedFile(StringIO):
+    """
+    File whose writes wait until released, like a pipe nobody reads
+    """
+    def __init__(self):
+        StringIO.__init__(self)
+        self.released = threading.Event()
+        self.blocked = threading.Event()
+
+    def write(self, data):
+        self.blocked.set()
+        self.released.wait()
+        StringIO.write(self, data)
+
+
+def test_fast_consumer():
+    output = StringIO()
+    logger = get_logger("test.scheduled_fast", logfile=StringIO())
+    logger.add_logfile(output, scheduled=True)
+    scheduled = logger._logfiles[-1]
+    assert isinstance(scheduled, ScheduledFile)
+    logger.dot_every(1)
+    for count in range(3):
+        logger.progress_step()
+    logger.msg("done")
+    scheduled.sync()
+    assert output.getvalue() == "...\n[test.scheduled_fast] done\n"
+    scheduled._stop()
+
+
+def test_order_kept_while_behind():
+    output = BlockedFile()
+    logger = get_logger("test.scheduled_behind", logfile=StringIO())
+    logger.add_logfile(output, scheduled=True)
+    scheduled = logger._logfiles[-1]
+    logger.dot_every(1)
+    logger.progress_every(0)
+    logger.progress_step()
+    output.blocked.wait()
+    # the writer is busy, but the backlog is small
+    logger.progress_step()
+    logger.info("first")
+    logger.progress_step()
+    logger.progress_step()
+    logger.msg("second")
+    logger.progress_step()
+    output.released.set()
+    scheduled.sync()
+    assert output.getvalue() == ("..\n[test.scheduled_behind] first\n"
+                                 "..\n[test.scheduled_behind] second\n.")
+    scheduled._stop()
+
+
+def test_priorities_under_backpressure():
+    output = BlockedFile()
+    logger = get_logger("test.scheduled_slow", logfile=StringIO())
+    logger.add_logfile(output, scheduled=True)
+    scheduled = logger._logfiles[-1]
+    logger.dot_every(1)
+    logger.percent_target(1000)
+    logger.percent_print_every(10)
+    logger.progress_step()
+    output.blocked.wait()
+    scheduled.reorder_backlog = 0
+    # the writer is stuck on the first dot, the job goes on
+    for count in range(999):
+        logger.progress_step()
+    logger.info("a detail")
+    logger.msg("important")
+    output.released.set()
+    scheduled.sync()
+    lines = output.getvalue().splitlines()
+    assert lines[0] == "."
+    assert lines[1] == "[test.scheduled_slow] important"
+    assert lines[2] == "[test.scheduled_slow] a detail"
+    # only the latest percentage
+    assert len(lines) == 5
+    assert lines[3].startswith("[test.scheduled_slow] 100%")
+    assert lines[4] == "[.x999]"
+    assert scheduled.coalesced == 999
+    assert scheduled.replaced > 0
+    scheduled._stop()
+
+
+def test_dots_counted_by_the_logger():
+    output = BlockedFile()
+    logger = get_logger("test.scheduled_count", logfile=StringIO())
+    logger.add_logfile(output, scheduled=True)
+    scheduled = logger._logfiles[-1]
+    logger.dot()
+    output.blocked.wait()
+    # multi-character dot strings, and messages made of one repeated
+    # character, are not mistaken for several dots
+    logger.dot(dot_string="==", count=100)
+    scheduled.write("!!!")
+    output.released.set()
+    scheduled.sync()
+    assert output.getvalue() == ".[==x100 !!!x1]"
+    scheduled._stop()
+
+
+def test_urgent_level():
+    output = BlockedFile()
+    scheduled = ScheduledFile(output, urgent_level=INFO, reorder_backlog=0)
+    scheduled.write(".")
+    output.blocked.wait()
+    for level, text in ((INFO - 1, "debug\n"), (INFO, "info\n")):
+        scheduled.message_begin(level)
+        scheduled.write(text)
+        scheduled.message_done(level)
+    output.released.set()
+    scheduled.sync()
+    assert output.getvalue() == ".\ninfo\ndebug\n"
+    scheduled.close()
+    assert output.closed
+
+
+def test_bounded_sync():
+    output = BlockedFile()
+    scheduled = ScheduledFile(output, sync_timeout=0.05)
+    scheduled.write(".")
+    output.blocked.wait()
+    # gives up on the reader
+    scheduled.sync()
+    assert output.getvalue() == ""
+    output.released.set()
+    scheduled.sync()
+    assert output.getvalue() == "."
+    scheduled._stop()
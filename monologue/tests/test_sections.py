@@ -0,0 +1,62 @@
+from StringIO import StringIO
+
+from monologue import get_logger
+
+
+def test_sections_report():
+    logfile = StringIO()
+    logger = get_logger("test.sections", logfile=logfile)
+    logger.dot_every(0)
+    logger.progress_every(2)
+    logger.sections_in_progress()
+
+    @logger.timed()
+    def write():
+        pass
+
+    for count in range(4):
+        with logger.section("parse"):
+            with logger.section("tokenize"):
+                pass
+        write()
+        logger.progress_step()
+    logger.progress_complete()
+    lines = logfile.getvalue().splitlines()
+    assert lines[0].startswith("[test.sections] Iteration 2 done (")
+    assert "parse " in lines[0] and "write " in lines[0]
+    assert lines[2] == "[test.sections] Successfully completed 4 iterations"
+    assert lines[3] == "[test.sections] Time spent in sections:"
+    report = [line.split(":")[0] for line in lines[4:]]
+    parse = report.index("[test.sections]   parse")
+    assert report[parse + 1] == "[test.sections]     tokenize"
+    assert "[test.sections]   write" in report
+    assert all(line.endswith(" in 4 calls") for line in lines[4:])
+
+
+def test_same_name_in_different_parents():
+    logger = get_logger("test.sections_tree", logfile=StringIO())
+    with logger.section("a"):
+        with logger.section("io"):
+            pass
+    with logger.section("b"):
+        with logger.section("io"):
+            pass
+    sections = logger._sections
+    assert sections.names.count("io") == 2
+    assert sections.current == 0
+    assert sections.depth == 0
+
+
+def _nest(logger, names):
+    if names:
+        with logger.section(names[0]):
+            _nest(logger, names[1:])
+
+
+def test_deep_nesting_and_unicode_names():
+    logger = get_logger("test.sections_deep", logfile=StringIO())
+    _nest(logger, [u"level %d" % depth for depth in range(100)])
+    report = logger._sections.report()
+    assert len(report) == 100
+    assert report[-1].strip().startswith("level 99:")
+    assert logger._sections.depth == 0
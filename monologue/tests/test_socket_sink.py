@@ -0,0 +1,118 @@
+from StringIO import StringIO
+from tempfile import mkdtemp
+import os
+import socket
+import struct
+import time
+
+from monologue import SocketSink, get_logger
+
+
+def _udp_receiver():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(('127.0.0.1', 0))
+    receiver.settimeout(5)
+    return receiver
+
+
+def test_udp_batching():
+    receiver = _udp_receiver()
+    sink = SocketSink(receiver.getsockname(), max_delay=3600)
+    logger = get_logger("test.socket_udp", logfile=StringIO())
+    logger.add_logfile(sink)
+    logger.set_dot_string("x")
+    logger.info("hello")
+    for count in range(3):
+        logger.dot()
+    logger.info("bye")
+    sink.sync()
+    assert receiver.recv(65536) == b"[test.socket_udp] hello\nxxx\n" \
+        b"[test.socket_udp] bye\n"
+    sink.close()
+    receiver.close()
+
+
+def test_flush_level_and_batch_size():
+    receiver = _udp_receiver()
+    sink = SocketSink(receiver.getsockname(), max_delay=3600, batch_bytes=10)
+    logger = get_logger("test.socket_flush", logfile=StringIO())
+    logger.add_logfile(sink)
+    logger.set_dot_string("x")
+    logger.warning("sent at once")
+    assert receiver.recv(65536) == b"[test.socket_flush] sent at once\n"
+    sink.close()
+    receiver.close()
+
+
+def test_unix_stream_frames():
+    directory = mkdtemp()
+    path = os.path.join(directory, "collector.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    sink = SocketSink(path, kind='stream', max_delay=3600)
+    logger = get_logger("test.socket_stream", logfile=StringIO())
+    logger.add_logfile(sink)
+    logger.set_dot_string("x")
+    logger.msg("first")
+    sink.sync()
+    connection = server.accept()[0]
+    connection.settimeout(5)
+    header = connection.recv(4)
+    length = struct.unpack('!I', header)[0]
+    assert connection.recv(length) == b"[test.socket_stream] first\n"
+    sink.close()
+    connection.close()
+    server.close()
+    os.unlink(path)
+    os.rmdir(directory)
+
+
+def test_backpressure_drops_dots():
+    directory = mkdtemp()
+    # nobody listens there
+    sink = SocketSink(os.path.join(directory, "nobody.sock"), batch_bytes=1,
+                      max_backlog=50)
+    logger = get_logger("test.socket_drop", logfile=StringIO())
+    logger.add_logfile(sink)
+    logger.set_dot_string("x")
+    for count in range(100):
+        logger.dot()
+    logger.msg("kept")
+    # 50 dots and the line break before the message
+    assert sink.dropped == 51
+    assert sink._queue[-1] == b"[test.socket_drop] kept\n"
+    os.rmdir(directory)
+
+
+def test_tcp_connect_does_not_block():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    server.settimeout(5)
+    sink = SocketSink(server.getsockname(), kind='stream', max_delay=3600)
+    logger = get_logger("test.socket_tcp", logfile=StringIO())
+    logger.add_logfile(sink)
+    logger.set_dot_string("x")
+    logger.warning("hello")
+    connection = server.accept()[0]
+    connection.settimeout(5)
+    # sent once the connection is established
+    deadline = time.time() + 5
+    while sink._queue and time.time() < deadline:
+        sink.sync()
+        time.sleep(0.01)
+    length = struct.unpack('!I', connection.recv(4))[0]
+    assert connection.recv(length) == b"[test.socket_tcp] hello\n"
+    sink.close()
+    connection.close()
+    server.close()
+    # unroutable address: the logging call returns at once
+    sink = SocketSink(('10.255.255.1', 9), kind='stream')
+    logger = get_logger("test.socket_unroutable", logfile=StringIO())
+    logger.add_logfile(sink)
+    logger.set_dot_string("x")
+    start = time.time()
+    logger.warning("lost")
+    assert time.time() - start < 0.5
+    sink.close()
@@ -0,0 +1,41 @@
+from StringIO import StringIO
+from logging import DEBUG
+
+import monologue
+from monologue import get_logger
+
+
+def test_registry_stats():
+    first = StringIO()
+    second = StringIO()
+    noisy = get_logger("test.stats_noisy", logfile=first)
+    quiet = get_logger("test.stats_quiet", logfile=second)
+    noisy.set_dot_string("xy")
+    for count in range(10):
+        noisy.dot()
+    noisy.msg("hello")
+    noisy.add_logfile(StringIO(), dots=False)
+    quiet.flight_recorder()
+    quiet.msg("suppressed", verbosity=DEBUG)
+    quiet.warning("warning")
+
+    snapshot = monologue.stats()
+    noisy_stats = snapshot['loggers']['test.stats_noisy']
+    assert noisy_stats['dots'] == 10
+    assert noisy_stats['messages'] == {monologue.CRITICAL: 1}
+    assert sorted(noisy_stats['characters'].values()) == [0, 20 + 25]
+    quiet_stats = snapshot['loggers']['test.stats_quiet']
+    assert quiet_stats['suppressed'] == 1
+    assert quiet_stats['messages'] == {monologue.WARNING: 1}
+    total = snapshot['total']
+    assert total['dots'] >= 10
+    assert total['suppressed'] >= 1
+    assert total['characters'] >= 20 + 25 + 27
+
+
+def test_suppressed_without_recorder():
+    logger = get_logger("test.stats_suppressed", logfile=StringIO())
+    logger.debug("suppressed")
+    logger.msg("suppressed", verbosity=DEBUG)
+    logger.info("written")
+    assert logger.stats()['suppressed'] == 2
@@ -0,0 +1,86 @@
+from StringIO import StringIO
+from io import BytesIO
+from tempfile import TemporaryFile, mkdtemp
+import json
+import os
+import shutil
+
+from monologue import get_logger
+
+
+def test_readinto_no_copy():
+    with TemporaryFile() as fileobj:
+        fileobj.write(b'abcdefghij')
+        fileobj.seek(2)
+        logfile = StringIO()
+        logger = get_logger("test.track_file_readinto", logfile=logfile)
+        logger.dot_every(0)
+        logger.percent_print_every(25)
+        tracked = logger.track_file(fileobj)
+        buf = bytearray(4)
+        assert tracked.readinto(buf) == 4
+    assert buf == bytearray(b'cdef')
+    assert logger._iterations == 4
+    assert logger._percent_target == 8
+    assert logfile.getvalue() == "[test.track_file_readinto] 25%\n" \
+        "[test.track_file_readinto] 50%\n"
+
+
+def test_reader_without_size():
+    logfile = StringIO()
+    logger = get_logger("test.track_reader", logfile=logfile)
+    logger.dot_every(0)
+    logger.progress_every(4)
+    tracked = logger.track_reader(BytesIO(b'line 1\nline 2\n'))
+    assert list(tracked) == [b'line 1\n', b'line 2\n']
+    assert logger._iterations == 14
+    assert logfile.getvalue().startswith(
+        "[test.track_reader] Iteration 4 done (")
+    logger.progress_complete()
+    assert "Processed 0.0 MB" in logfile.getvalue()
+
+
+def test_reader_saves_checkpoints():
+    directory = mkdtemp()
+    try:
+        path = os.path.join(directory, "job.progress")
+        logger = get_logger("test.track_reader_resume", logfile=StringIO())
+        logger.dot_every(0)
+        logger.progress_every(100)
+        tracked = logger.track_reader(BytesIO(b'x' * 250))
+        logger.resume_from(path, interval=0)
+        while tracked.read(50):
+            pass
+        logger._checkpoint.wait()
+        with open(path) as fdesc:
+            assert json.load(fdesc)['iterations'] == 200
+    finally:
+        shutil.rmtree(directory)
+
+
+class CountingWrites(StringIO):
+    writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        StringIO.write(self, data)
+
+
+def test_one_write_per_read():
+    logfile = CountingWrites()
+    logger = get_logger("test.track_file_dots", logfile=logfile)
+    logger.dot_every(1000)
+    tracked = logger.track_reader(BytesIO(b'x' * 10000))
+    while tracked.read(5000):
+        pass
+    assert logfile.getvalue() == "." * 10
+    assert logfile.writes == 2
+
+
+def test_megabyte_dots_by_default():
+    logfile = StringIO()
+    logger = get_logger("test.track_file_default", logfile=logfile)
+    tracked = logger.track_reader(BytesIO(b'x' * (3 * 1024 * 1024 + 1)))
+    while tracked.read(1024 * 1024):
+        pass
+    assert logfile.getvalue() == "..."